@@ -0,0 +1,130 @@
+"""SQLAlchemy CPU per execution for the statements every request runs.
+
+    python -m benchmarks.hot_queries [iterations]
+
+Times building the statement plus the compiled cache lookup on the asyncpg
+dialect (no database), which is the part that runs before the driver sends
+anything. "rebuilt" constructs the query per call as the endpoints used to,
+"prebuilt" reuses the objects from src.hot_queries, and "lambda" wraps the
+same query in lambda_stmt for comparison. The SQL text is identical in every
+case, so asyncpg's prepared statement cache hits the same way for all three.
+"""
+import sys
+import timeit
+import uuid
+
+from sqlalchemy import select, and_, lambda_stmt
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as asyncpg_dialect
+from sqlalchemy.util import LRUCache
+
+from src.hot_queries import USER_BY_USERNAME, GROUP_ROLE, TASK_ROLE, USER_GROUPS_PAGE
+from src.tasks.models import Task, GroupAccess
+from src.tasks.projections import GROUP_LIST_COLUMNS
+from src.user.models import User
+
+USERNAME = "user-1"
+USER_ID = uuid.uuid4()
+GROUP_ID = 1
+TASK_ID = 1
+
+
+def user_by_username():
+    return select(User).where(User.username == USERNAME)
+
+
+def group_role():
+    return (select(GroupAccess.role)
+            .where(and_(GroupAccess.group_id == GROUP_ID,
+                        GroupAccess.user_id == USER_ID,
+                        GroupAccess.access == True))
+            .limit(1))
+
+
+def task_role():
+    return (select(GroupAccess.role, Task.group_id)
+            .join(Task, Task.group_id == GroupAccess.group_id)
+            .where(and_(Task.id == TASK_ID,
+                        GroupAccess.user_id == USER_ID,
+                        GroupAccess.access == True))
+            .limit(1))
+
+
+def user_groups_page():
+    return (select(*GROUP_LIST_COLUMNS)
+            .join(GroupAccess)
+            .where(and_(GroupAccess.user_id == USER_ID,
+                        GroupAccess.access == True,
+                        GroupAccess.group_id > 0))
+            .order_by(GroupAccess.group_id)
+            .limit(51))
+
+
+def lambda_user_by_username():
+    username = USERNAME
+    return lambda_stmt(lambda: select(User).where(User.username == username))
+
+
+def lambda_group_role():
+    group_id, user_id = GROUP_ID, USER_ID
+    return lambda_stmt(lambda: select(GroupAccess.role)
+                       .where(and_(GroupAccess.group_id == group_id,
+                                   GroupAccess.user_id == user_id,
+                                   GroupAccess.access == True))
+                       .limit(1))
+
+
+def lambda_task_role():
+    task_id, user_id = TASK_ID, USER_ID
+    return lambda_stmt(lambda: select(GroupAccess.role, Task.group_id)
+                       .join(Task, Task.group_id == GroupAccess.group_id)
+                       .where(and_(Task.id == task_id,
+                                   GroupAccess.user_id == user_id,
+                                   GroupAccess.access == True))
+                       .limit(1))
+
+
+def lambda_user_groups_page():
+    user_id, after, limit = USER_ID, 0, 51
+    return lambda_stmt(lambda: select(*GROUP_LIST_COLUMNS)
+                       .join(GroupAccess)
+                       .where(and_(GroupAccess.user_id == user_id,
+                                   GroupAccess.access == True,
+                                   GroupAccess.group_id > after))
+                       .order_by(GroupAccess.group_id)
+                       .limit(limit))
+
+
+STATEMENTS = {
+    "user by username": (user_by_username, USER_BY_USERNAME, lambda_user_by_username),
+    "group role": (group_role, GROUP_ROLE, lambda_group_role),
+    "task role": (task_role, TASK_ROLE, lambda_task_role),
+    "user groups page": (user_groups_page, USER_GROUPS_PAGE, lambda_user_groups_page),
+}
+
+
+def compile_cost(build, iterations: int) -> float:
+    dialect = asyncpg_dialect()
+    cache = LRUCache(500)
+
+    def run():
+        build()._compile_w_cache(dialect, compiled_cache=cache, column_keys=[], for_executemany=False,
+                                 schema_translate_map=None)
+
+    run()
+    return min(timeit.repeat(run, number=iterations, repeat=5)) / iterations
+
+
+def main(iterations: int = 2000) -> None:
+    print(f"{'statement':<20} {'rebuilt':>10} {'prebuilt':>10} {'lambda':>10}   (us per execution)")
+    totals = [0.0, 0.0, 0.0]
+    for name, (rebuilt, prebuilt, lambda_built) in STATEMENTS.items():
+        costs = [compile_cost(rebuilt, iterations),
+                 compile_cost(lambda: prebuilt, iterations),
+                 compile_cost(lambda_built, iterations)]
+        totals = [total + cost for total, cost in zip(totals, costs)]
+        print(f"{name:<20} " + " ".join(f"{cost * 1e6:10.1f}" for cost in costs))
+    print(f"{'all of the above':<20} " + " ".join(f"{cost * 1e6:10.1f}" for cost in totals))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,198 @@
+"""Scripted load scenarios against a running API with latency percentiles.
+
+    python -m benchmarks.load [--base-url URL] [--scenarios login,list_groups,...] [--concurrency N]
+                              [--duration S] [--warmup S] [--users N] [--no-cache] [--output FILE]
+                              [--compare FILE]
+
+Needs aiohttp and a database seeded with benchmarks.seed; start the app, a
+worker and Redis the usual way first. Virtual users log in as bench-user-<n>
+and discover a group and task they can manage before timing starts. Each
+scenario then runs for --duration seconds at --concurrency in-flight requests
+and reports throughput and p50/p95/p99 latency. --output writes the report
+with the git commit so --compare can print the change against an earlier run.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import time
+
+import aiohttp
+
+from benchmarks.seed import BENCHMARK_PASSWORD, username
+
+MANAGE_ROLES = {"admin", "manager"}
+
+
+class VirtualUser:
+    def __init__(self, name: str):
+        self.name = name
+        self.headers = {}
+        self.group_id = None
+        self.task_id = None
+
+
+async def prepare_user(session: aiohttp.ClientSession, name: str) -> VirtualUser:
+    user = VirtualUser(name)
+    async with session.post("/login", data={"username": name, "password": BENCHMARK_PASSWORD}) as response:
+        response.raise_for_status()
+        user.headers["Authorization"] = f"Bearer {(await response.json())['access_token']}"
+    async with session.get("/tasks/group/get", params={"limit": 50}, headers=user.headers) as response:
+        response.raise_for_status()
+        groups = (await response.json())["items"]
+    managed = [group for group in groups if group["role"] in MANAGE_ROLES] or groups
+    if managed:
+        user.group_id = managed[0]["id"]
+        async with session.get("/tasks/tasks/get", params={"group_id": user.group_id, "limit": 50},
+                               headers=user.headers) as response:
+            response.raise_for_status()
+            tasks = (await response.json())["tasks"]
+        user.task_id = tasks[0]["id"] if tasks else None
+    return user
+
+
+def scenario_login(session, user: VirtualUser, headers: dict):
+    return session.post("/login", data={"username": user.name, "password": BENCHMARK_PASSWORD})
+
+
+def scenario_list_groups(session, user: VirtualUser, headers: dict):
+    return session.get("/tasks/group/get", params={"limit": 50}, headers=headers)
+
+
+def scenario_get_tasks(session, user: VirtualUser, headers: dict):
+    return session.get("/tasks/tasks/get", params={"group_id": user.group_id, "limit": 50}, headers=headers)
+
+
+def scenario_update_task(session, user: VirtualUser, headers: dict):
+    return session.patch("/tasks/task/update", params={"task_id": user.task_id},
+                         json={"completed": random.random() < 0.5}, headers=headers)
+
+
+def scenario_dashboard(session, user: VirtualUser, headers: dict):
+    return session.get("/email/dashboard", headers=headers)
+
+
+SCENARIOS = {
+    "login": scenario_login,
+    "list_groups": scenario_list_groups,
+    "get_tasks": scenario_get_tasks,
+    "update_task": scenario_update_task,
+    "dashboard": scenario_dashboard,
+}
+
+
+async def run_scenario(session: aiohttp.ClientSession, scenario, users: list, args) -> dict:
+    latencies, errors = [], 0
+    measuring = False
+    deadline = time.monotonic() + args.warmup + args.duration
+
+    async def worker(offset: int):
+        nonlocal errors
+        index = offset
+        while time.monotonic() < deadline:
+            user = users[index % len(users)]
+            index += args.concurrency
+            headers = {**user.headers, **({"Cache-Control": "no-cache"} if args.no_cache else {})}
+            started = time.perf_counter()
+            try:
+                async with scenario(session, user, headers) as response:
+                    await response.read()
+                    failed = response.status >= 400
+            except aiohttp.ClientError:
+                failed = True
+            if measuring:
+                latencies.append(time.perf_counter() - started)
+                errors += failed
+
+    workers = [asyncio.create_task(worker(offset)) for offset in range(args.concurrency)]
+    await asyncio.sleep(args.warmup)
+    measuring = True
+    measured_from = time.monotonic()
+    await asyncio.gather(*workers)
+    elapsed = time.monotonic() - measured_from
+    return summarize(latencies, errors, elapsed)
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    if len(latencies) < 2:
+        return {"requests": len(latencies), "errors": errors}
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict, baseline: dict = None) -> None:
+    print(f"commit {report['commit']}, concurrency {report['concurrency']}, {report['duration']}s per scenario")
+    print(f"  {'scenario':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, result in report["scenarios"].items():
+        line = (f"  {name:<12} {result.get('throughput', 0):9.1f} {result.get('p50_ms', 0):9.2f} "
+                f"{result.get('p95_ms', 0):9.2f} {result.get('p99_ms', 0):9.2f} {result['errors']:7d}")
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous and previous.get("throughput") and result.get("throughput"):
+            line += (f"   vs {baseline['commit']}: req/s {result['throughput'] / previous['throughput'] - 1:+.1%}, "
+                     f"p99 {result['p99_ms'] / previous['p99_ms'] - 1:+.1%}")
+        print(line)
+
+
+async def run(args) -> dict:
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(args.base_url, connector=connector) as session:
+        names = [username(n) for n in random.Random(args.seed).sample(range(args.users), args.virtual_users)]
+        users = await asyncio.gather(*(prepare_user(session, name) for name in names))
+        report = {"commit": git_commit(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "concurrency": args.concurrency, "duration": args.duration, "no_cache": args.no_cache,
+                  "scenarios": {}}
+        for name in args.scenarios:
+            eligible = [user for user in users if name not in ("get_tasks", "update_task") or user.task_id]
+            report["scenarios"][name] = await run_scenario(session, SCENARIOS[name], eligible, args)
+        return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=5)
+    parser.add_argument("--users", type=int, default=10000, help="users seeded by benchmarks.seed")
+    parser.add_argument("--virtual-users", type=int, default=200, help="distinct accounts to log in as")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-cache", action="store_true", help="send Cache-Control: no-cache to bypass caches")
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    report = asyncio.run(run(args))
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Password verification throughput and event loop stalls for the login path.
+
+    python -m benchmarks.login [rounds] [concurrency] [requests]
+
+Runs the bcrypt verify that /login performs (no database) three ways: inline
+on the event loop as before, and through the bounded password executor with
+1 and PASSWORD_HASH_WORKERS threads. A ticker coroutine measures how late the
+loop wakes up, which is the latency every other request would see. Use the
+logins/s figure per worker process to size the deployment for a given cost.
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from src.config import PASSWORD_HASH_WORKERS
+
+TICK = 0.005
+
+
+async def measure_lag(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+
+async def run(context: CryptContext, hashed: str, executor, concurrency: int, requests: int) -> tuple:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            if executor is None:
+                context.verify_and_update("password", hashed)
+            else:
+                await loop.run_in_executor(executor, context.verify_and_update, "password", hashed)
+
+    stop, lags = asyncio.Event(), []
+    ticker = asyncio.create_task(measure_lag(stop, lags))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    return requests / elapsed, max(lags, default=0.0)
+
+
+def main(rounds: int = 12, concurrency: int = 16, requests: int = 64) -> None:
+    context = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+    hashed = context.hash("password")
+    print(f"bcrypt rounds={rounds}, concurrency={concurrency}, {requests} logins")
+    variants = {"inline on event loop": None, "executor, 1 thread": 1}
+    if PASSWORD_HASH_WORKERS > 1:
+        variants[f"executor, {PASSWORD_HASH_WORKERS} threads"] = PASSWORD_HASH_WORKERS
+    for name, workers in variants.items():
+        executor = ThreadPoolExecutor(max_workers=workers) if workers else None
+        rate, lag = asyncio.run(run(context, hashed, executor, concurrency, requests))
+        if executor is not None:
+            executor.shutdown()
+        print(f"  {name:<24} {rate:8.1f} logins/s   max loop lag {lag * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,52 @@
+"""Per-request cost of turning result rows into JSON for group listings.
+
+    python -m benchmarks.row_projection [rows ...]
+
+Rows come from an in-memory SQLite table shaped like the get_group query, so
+the Row objects are the same type the endpoints see. Compare each path against
+the "fetch only" baseline to get the post-fetch cost.
+"""
+import sys
+import timeit
+import uuid
+
+import orjson
+from sqlalchemy import create_engine, Table, Column, Integer, String, MetaData, insert, select
+
+from src.tasks.models import Role
+from src.tasks.projections import rows_to_dicts
+from src.tasks.schemas import GroupGet
+
+metadata = MetaData()
+groups = Table("groups", metadata,
+               Column("id", Integer, primary_key=True),
+               Column("name", String),
+               Column("owner", String),
+               Column("role", String))
+
+
+def main(sizes=(1000, 100000), repeat: int = 5) -> None:
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    roles = [role.value for role in Role]
+    with engine.begin() as conn:
+        conn.execute(insert(groups), [{"id": i, "name": f"group {i}", "owner": str(uuid.uuid4()),
+                                       "role": roles[i % len(roles)]} for i in range(max(sizes))])
+    for size in sizes:
+        with engine.connect() as conn:
+            query = select(groups).limit(size)
+            paths = {
+                "model_validate + model_dump": lambda: orjson.dumps(
+                    [GroupGet.model_validate(row, from_attributes=True).model_dump(mode="json")
+                     for row in conn.execute(query)]),
+                "rows_to_dicts + orjson": lambda: orjson.dumps(rows_to_dicts(conn.execute(query))),
+                "(fetch only)": lambda: conn.execute(query).all(),
+            }
+            print(f"{size} rows, best of {repeat} runs")
+            for name, path in paths.items():
+                best = min(timeit.repeat(path, number=1, repeat=repeat))
+                print(f"  {name:<36} {best * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or (1000, 100000))
@@ -0,0 +1,116 @@
+"""Seed the database with deterministic benchmark data.
+
+    python -m benchmarks.seed [--users N] [--groups N] [--tasks N] [--members N] [--seed N] [--reset]
+
+Defaults to 10k users, 100k groups and 10M tasks. Rows are bulk-loaded with
+COPY through asyncpg using the app's DB_* settings. Users are named
+bench-user-<n> and share the password BENCHMARK_PASSWORD, which is what
+benchmarks.load logs in with. Each group gets its owner as admin plus
+--members - 1 random members. The same seed always produces the same data, so
+results from different commits stay comparable.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from itertools import islice
+
+import asyncpg
+from passlib.context import CryptContext
+
+from src.config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASS, BCRYPT_ROUNDS
+
+BENCHMARK_PASSWORD = "benchmark"
+BATCH_SIZE = 50000
+BASE_DATE = datetime(2026, 1, 1)
+MEMBER_ROLES = ("manager", "user", "user")
+
+
+def username(n: int) -> str:
+    return f"bench-user-{n}"
+
+
+def batched(records, size: int):
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def generate_users(rng: random.Random, count: int) -> list[tuple]:
+    hashed_password = CryptContext(schemes=["bcrypt"]).hash(BENCHMARK_PASSWORD, rounds=BCRYPT_ROUNDS)
+    return [(uuid.UUID(int=rng.getrandbits(128), version=4), username(n), hashed_password,
+             f"{username(n)}@example.com", f"Name {n}", f"Surname {n}", True, False)
+            for n in range(count)]
+
+
+def generate_groups(rng: random.Random, user_ids: list, count: int):
+    for group_id in range(1, count + 1):
+        yield group_id, f"group {group_id}", f"benchmark group {group_id}", rng.choice(user_ids)
+
+
+def generate_access(rng: random.Random, user_ids: list, owners: list, members: int):
+    for group_id, owner in enumerate(owners, start=1):
+        yield owner, group_id, True, "admin"
+        for user_id in rng.sample(user_ids, min(members - 1, len(user_ids))):
+            if user_id != owner:
+                yield user_id, group_id, True, rng.choice(MEMBER_ROLES)
+
+
+def generate_tasks(rng: random.Random, groups: int, count: int):
+    per_group, remainder = divmod(count, groups)
+    for group_id in range(1, groups + 1):
+        for n in range(per_group + (group_id <= remainder)):
+            deadline = None if rng.random() < 0.1 else BASE_DATE + timedelta(minutes=rng.randrange(-43200, 43200))
+            yield f"task {group_id}-{n}", None, rng.random() < 0.5, None, deadline, group_id
+
+
+async def copy(conn: asyncpg.Connection, table: str, columns: list, records) -> int:
+    total = 0
+    for batch in batched(records, BATCH_SIZE):
+        await conn.copy_records_to_table(table, records=batch, columns=columns)
+        total += len(batch)
+    return total
+
+
+async def seed(args) -> None:
+    rng = random.Random(args.seed)
+    conn = await asyncpg.connect(host=DB_HOST, port=int(DB_PORT), user=DB_USER, password=DB_PASS, database=DB_NAME)
+    try:
+        if args.reset:
+            await conn.execute('TRUNCATE task, group_access, group_tasks, "user" RESTART IDENTITY CASCADE')
+        started = time.perf_counter()
+        users = generate_users(rng, args.users)
+        await copy(conn, "user", ["uuid", "username", "hashed_password", "email", "name", "surname", "is_active",
+                                  "is_admin"], users)
+        user_ids = [user[0] for user in users]
+        groups = list(generate_groups(rng, user_ids, args.groups))
+        await copy(conn, "group_tasks", ["id", "name", "description", "owner"], groups)
+        owners = [group[3] for group in groups]
+        del groups
+        access = await copy(conn, "group_access", ["user_id", "group_id", "access", "role"],
+                            generate_access(rng, user_ids, owners, args.members))
+        tasks = await copy(conn, "task", ["name", "description", "completed", "photo", "deadlines", "group_id"],
+                           generate_tasks(rng, args.groups, args.tasks))
+        await conn.execute("SELECT setval(pg_get_serial_sequence('group_tasks', 'id'), $1)", args.groups)
+        await conn.execute("ANALYZE")
+        print(f"seeded {args.users} users, {args.groups} groups, {access} access rows, {tasks} tasks "
+              f"in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--groups", type=int, default=100000)
+    parser.add_argument("--tasks", type=int, default=10000000)
+    parser.add_argument("--members", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="truncate the app tables first")
+    asyncio.run(seed(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare response serialization paths on large group payloads.
+
+    python -m benchmarks.serialization [tasks_per_group] [repeat]
+
+"old" is FastAPI's generic path for a route without response_model
+(jsonable_encoder + JSONResponse), the others are what routes use now.
+"""
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from src.tasks.schemas import GroupGetWithTaskPage, TaskGetWithGroup, AccessUser
+
+
+def build_payload(tasks_per_group: int) -> GroupGetWithTaskPage:
+    now = datetime.now()
+    return GroupGetWithTaskPage(
+        id=1,
+        name="benchmark group",
+        owner=uuid.uuid4(),
+        tasks=[TaskGetWithGroup(id=i, name=f"task {i}", completed=i % 2 == 0, deadlines=now + timedelta(hours=i))
+               for i in range(tasks_per_group)],
+        access=[AccessUser(id=i, user_id=uuid.uuid4(), access=True) for i in range(100)],
+        next_cursor=None,
+    )
+
+
+def main(tasks_per_group: int = 10000, repeat: int = 20) -> None:
+    payload = build_payload(tasks_per_group)
+    adapter = TypeAdapter(GroupGetWithTaskPage)
+    paths = {
+        "old: jsonable_encoder + JSONResponse": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "response_model + ORJSONResponse": lambda: ORJSONResponse(adapter.dump_python(payload, mode="json")).body,
+        "model_dump_json (cached path)": lambda: payload.model_dump_json().encode(),
+    }
+    sizes = {name: len(path()) for name, path in paths.items()}
+    baseline = None
+    print(f"{tasks_per_group} tasks, best of {repeat} runs")
+    for name, path in paths.items():
+        best = min(timeit.repeat(path, number=1, repeat=repeat))
+        baseline = baseline or best
+        print(f"{name:<40} {best * 1000:9.2f} ms  x{baseline / best:5.1f}  {sizes[name]} bytes")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
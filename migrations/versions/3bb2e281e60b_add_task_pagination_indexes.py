@@ -0,0 +1,39 @@
+"""Add task pagination indexes
+
+Revision ID: 3bb2e281e60b
+Revises: bfcbb57191c4
+Create Date: 2026-10-18 11:02:17.504921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3bb2e281e60b'
+down_revision: Union[str, None] = 'bfcbb57191c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_group_deadlines_id', 'task', ['group_id', 'deadlines', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_task_group_name', 'task', ['group_id', 'name'],
+                        postgresql_ops={'name': 'text_pattern_ops'},
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_task_group_id', table_name='task',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_group_id', 'task', ['group_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_task_group_name', table_name='task',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_task_group_deadlines_id', table_name='task',
+                      postgresql_concurrently=True, if_exists=True)
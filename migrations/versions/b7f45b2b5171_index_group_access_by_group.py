@@ -0,0 +1,35 @@
+"""Index group access by group
+
+Revision ID: b7f45b2b5171
+Revises: 3bb2e281e60b
+Create Date: 2026-10-18 14:05:37.611842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7f45b2b5171'
+down_revision: Union[str, None] = '3bb2e281e60b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_group_access_group_id', 'group_access', ['group_id', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_group_access_group_active', table_name='group_access',
+                      postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_group_access_group_active', 'group_access', ['group_id'],
+                        postgresql_where=sa.text('access'),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('ix_group_access_group_id', table_name='group_access',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,40 @@
+"""Add query indexes
+
+Revision ID: bfcbb57191c4
+Revises: 3e5f567a505f
+Create Date: 2026-10-18 10:12:41.218304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bfcbb57191c4'
+down_revision: Union[str, None] = '3e5f567a505f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_group_access_user_group_active', 'group_access', ['user_id', 'group_id'],
+                        postgresql_include=['role'], postgresql_where=sa.text('access'),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_group_access_group_active', 'group_access', ['group_id'],
+                        postgresql_where=sa.text('access'),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_task_group_id', 'task', ['group_id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_task_group_id', table_name='task',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_group_access_group_active', table_name='group_access',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_group_access_user_group_active', table_name='group_access',
+                      postgresql_concurrently=True, if_exists=True)
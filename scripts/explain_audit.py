@@ -0,0 +1,87 @@
+"""EXPLAIN-based index audit for the hot query shapes.
+
+Run against a seeded database (same env as the app):
+
+    python -m scripts.explain_audit
+
+The statements come from src.hot_queries and src.tasks.projections, so the
+audit follows what the endpoints run; only the group users and task page
+shapes are built here. Every query is explained with ANALYZE off; any
+sequential scan on one of the audited tables is reported and the script exits
+with status 1.
+"""
+import asyncio
+import json
+import sys
+
+from sqlalchemy import select, and_, text
+from sqlalchemy.dialects import postgresql
+
+from src.database import engine
+from src.hot_queries import USER_BY_USERNAME, USER_PASSWORD_HASH, GROUP_ROLE, TASK_ROLE, USER_GROUPS_PAGE
+from src.tasks.models import Task, GroupAccess
+from src.tasks.projections import user_groups_query, groups_tasks_query, groups_access_query
+from src.user.models import User
+
+AUDITED_TABLES = {"user", "task", "group_tasks", "group_access"}
+
+
+def get_queries(user_id, group_id, task_id, username):
+    return {
+        "user by name": USER_BY_USERNAME.params(username=username),
+        "password hash": USER_PASSWORD_HASH.params(username=username),
+        "group role": GROUP_ROLE.params(group_id=group_id, user_id=user_id),
+        "task role": TASK_ROLE.params(task_id=task_id, user_id=user_id),
+        "user groups": USER_GROUPS_PAGE.params(user_id=user_id, after=0, limit=51),
+        "report groups": user_groups_query(user_id),
+        "group users": (select(GroupAccess)
+                        .where(and_(GroupAccess.group_id == group_id,
+                                    GroupAccess.access == True))),
+        "group tasks": groups_tasks_query([group_id]),
+        "task page": (select(Task)
+                      .where(Task.group_id == group_id)
+                      .order_by(Task.deadlines.asc().nulls_last(), Task.id)
+                      .limit(51)),
+        "group access": groups_access_query([group_id]),
+    }
+
+
+def find_seq_scans(plan: dict) -> list:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in AUDITED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(find_seq_scans(child))
+    return found
+
+
+async def audit() -> int:
+    dialect = postgresql.asyncpg.dialect()
+    failures = 0
+    async with engine.connect() as conn:
+        sample = (await conn.execute(
+            select(GroupAccess.user_id, GroupAccess.group_id, Task.id, User.username)
+            .join(Task, Task.group_id == GroupAccess.group_id)
+            .join(User, User.uuid == GroupAccess.user_id)
+            .where(GroupAccess.access == True)
+            .limit(1)
+        )).first()
+        if sample is None:
+            print("Database is empty, seed it first")
+            return 1
+        for name, query in get_queries(*sample).items():
+            sql = str(query.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            seq_scans = find_seq_scans(plan[0]["Plan"])
+            status = "SEQ SCAN on " + ", ".join(sorted(set(seq_scans))) if seq_scans else "ok"
+            print(f"{name:<15} {plan[0]['Plan']['Total Cost']:>12} {status}")
+            failures += bool(seq_scans)
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(audit()))
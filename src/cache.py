@@ -0,0 +1,282 @@
+import asyncio
+import hashlib
+import inspect
+import logging
+import math
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional, Callable
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.config import RESPONSE_CACHE_L1_MAX_BYTES, RESPONSE_CACHE_L1_MAX_SIZE, RESPONSE_CACHE_L1_TTL, \
+    RESPONSE_CACHE_EARLY_REFRESH_BETA, RESPONSE_CACHE_SINGLE_FLIGHT_TIMEOUT
+from src.metrics import record_cache, CACHE_TIER_LOOKUPS
+from src.redis_client import redis
+from src.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "response-cache"
+KEY_VERSION = "v1"
+PAYLOAD_VERSION = b"v1"
+TAG_KEY_PREFIX = "cache-tag:"
+GENERATION_KEY_PREFIX = "cache-gen:"
+GENERATION_TTL = 3600
+INVALIDATION_CHANNEL = "response-cache:invalidate"
+
+# Stores an entry only if none of its tags was invalidated after the compute started
+# (ARGV[1], Redis server time in microseconds), so a miss that read pre-commit data
+# cannot write its body back after the mutation purged the tag.
+STORE_SCRIPT = """
+local count = tonumber(ARGV[4])
+for i = 1, count do
+    local generation = redis.call('GET', KEYS[1 + i])
+    if generation and tonumber(generation) >= tonumber(ARGV[1]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+for i = 1, count do
+    local tag_key = KEYS[1 + count + i]
+    redis.call('SADD', tag_key, KEYS[1])
+    if redis.call('TTL', tag_key) < tonumber(ARGV[3]) then
+        redis.call('EXPIRE', tag_key, ARGV[3])
+    end
+end
+return 1
+"""
+store_entry = redis.register_script(STORE_SCRIPT)
+
+cache_tags: ContextVar[Optional[set]] = ContextVar("cache_tags", default=None)
+
+
+def start_cache_tags(*tags: str) -> None:
+    cache_tags.set(set(tags))
+
+
+def tag_cache(*tags: str) -> None:
+    current = cache_tags.get()
+    if current is not None:
+        current.update(tags)
+
+
+def group_tag(group_id) -> str:
+    return f"group:{group_id}"
+
+
+def user_tag(user_id) -> str:
+    return f"user:{user_id}"
+
+
+def build_cache_key(namespace: str, path: str, query: list, user_id) -> str:
+    digest = hashlib.blake2b(f"{path}?{query}|{user_id}".encode(), digest_size=16).hexdigest()
+    return f"{KEY_VERSION}:{namespace}:{digest}"
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "expires_at", "delta")
+
+    def __init__(self, body: bytes, etag: str, expires_at: float, delta: float):
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.delta = delta
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    def dump(self) -> bytes:
+        return b"\n".join((PAYLOAD_VERSION, b"%f" % self.delta, self.etag.encode(), self.body))
+
+    @classmethod
+    def load(cls, raw: bytes, expires_at: float) -> Optional["CacheEntry"]:
+        parts = raw.split(b"\n", 3)
+        if len(parts) != 4 or parts[0] != PAYLOAD_VERSION:
+            return None
+        return cls(parts[3], parts[2].decode(), expires_at, float(parts[1]))
+
+    def to_response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag}
+        if request.headers.get("if-none-match") == self.etag:
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+    def should_refresh(self) -> bool:
+        remaining = self.expires_at - time.monotonic()
+        if remaining <= 0:
+            return True
+        if not RESPONSE_CACHE_EARLY_REFRESH_BETA or not self.delta:
+            return False
+        return self.delta * RESPONSE_CACHE_EARLY_REFRESH_BETA * -math.log(1.0 - random.random()) >= remaining
+
+
+class TwoTierCache:
+    def __init__(self):
+        self.local = TTLCache(max_size=RESPONSE_CACHE_L1_MAX_SIZE, ttl=RESPONSE_CACHE_L1_TTL,
+                              max_bytes=RESPONSE_CACHE_L1_MAX_BYTES)
+        self.in_flight: dict[str, asyncio.Future] = {}
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.local.get(key)
+        if entry is not None:
+            CACHE_TIER_LOOKUPS.labels("l1").inc()
+            return entry
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                ttl_ms, raw = await pipe.pttl(key).get(key).execute()
+        except RedisError:
+            ttl_ms, raw = -2, None
+        entry = CacheEntry.load(raw, time.monotonic() + ttl_ms / 1000) if raw is not None and ttl_ms > 0 else None
+        if entry is None:
+            CACHE_TIER_LOOKUPS.labels("miss").inc()
+            return None
+        CACHE_TIER_LOOKUPS.labels("l2").inc()
+        self.local.set(key, entry, ttl=min(RESPONSE_CACHE_L1_TTL, ttl_ms / 1000))
+        return entry
+
+    async def clock(self) -> Optional[int]:
+        try:
+            seconds, microseconds = await redis.time()
+        except RedisError:
+            return None
+        return seconds * 1_000_000 + microseconds
+
+    async def set(self, key: str, body: bytes, expire: int, delta: float, tags: set,
+                  started_at: Optional[int]) -> CacheEntry:
+        etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        entry = CacheEntry(body, etag, time.monotonic() + expire, delta)
+        stored = True
+        if started_at is not None:
+            tags = list(tags)
+            try:
+                stored = await store_entry(keys=[key, *[GENERATION_KEY_PREFIX + tag for tag in tags],
+                                                 *[TAG_KEY_PREFIX + tag for tag in tags]],
+                                           args=[started_at, entry.dump(), expire, len(tags)])
+            except RedisError:
+                pass
+        if stored:
+            self.local.set(key, entry, ttl=min(RESPONSE_CACHE_L1_TTL, expire))
+        return entry
+
+    def evict(self, keys) -> None:
+        for key in keys:
+            self.local.pop(key.decode() if isinstance(key, bytes) else key)
+
+    async def listen_invalidations(self) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.evict(message["data"].split(b"\n"))
+            except asyncio.CancelledError:
+                raise
+            except RedisError:
+                logger.warning("Response cache invalidation listener lost connection, retrying")
+                self.local.clear()
+                await asyncio.sleep(1)
+
+
+response_cache = TwoTierCache()
+
+
+async def invalidate_cache_tags(*tags: str) -> None:
+    tag_keys = [TAG_KEY_PREFIX + tag for tag in tags]
+    if not tag_keys:
+        return
+    try:
+        generation = await response_cache.clock()
+        if generation is None:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.set(GENERATION_KEY_PREFIX + tag, generation, ex=GENERATION_TTL)
+            pipe.sunion(tag_keys)
+            *_, keys = await pipe.execute()
+        response_cache.evict(keys)
+        async with redis.pipeline(transaction=False) as pipe:
+            if keys:
+                pipe.delete(*keys)
+                pipe.publish(INVALIDATION_CHANNEL, b"\n".join(keys))
+            pipe.delete(*tag_keys)
+            await pipe.execute()
+    except RedisError:
+        pass
+
+
+def encode_response(value) -> bytes:
+    if isinstance(value, BaseModel):
+        return value.model_dump_json().encode()
+    try:
+        return orjson.dumps(value)
+    except TypeError:
+        return orjson.dumps(jsonable_encoder(value))
+
+
+def cached(expire: int, key_builder: Callable, namespace: str = ""):
+    def wrapper(func):
+        signature = inspect.signature(func)
+        request_param = next((param for param in signature.parameters.values() if param.annotation is Request),
+                             None)
+        if request_param is None:
+            parameters = [*signature.parameters.values(),
+                          inspect.Parameter(name="request", annotation=Request, kind=inspect.Parameter.KEYWORD_ONLY)]
+            func.__signature__ = signature.replace(parameters=parameters)
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            request: Request = kwargs.get("request")
+            call_kwargs = kwargs if request_param is not None else \
+                {name: value for name, value in kwargs.items() if name != "request"}
+            if request is None or request.headers.get("Cache-Control") in ("no-store", "no-cache"):
+                record_cache("bypass")
+                return await func(*args, **call_kwargs)
+            key = key_builder(func, namespace, request=request, response=None, args=args, kwargs=call_kwargs)
+            key = f"{KEY_PREFIX}:{key}"
+            entry = await response_cache.get(key)
+            if entry is not None and not entry.should_refresh():
+                record_cache("hit")
+                return entry.to_response(request)
+            leader = response_cache.in_flight.get(key)
+            if leader is not None and entry is None:
+                try:
+                    entry = await asyncio.wait_for(asyncio.shield(leader), RESPONSE_CACHE_SINGLE_FLIGHT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    entry = None
+                if entry is not None:
+                    record_cache("hit")
+                    return entry.to_response(request)
+            elif leader is not None:
+                record_cache("hit")
+                return entry.to_response(request)
+            record_cache("miss")
+            future = asyncio.get_running_loop().create_future()
+            response_cache.in_flight[key] = future
+            try:
+                started_at = await response_cache.clock()
+                started = time.perf_counter()
+                value = await func(*args, **call_kwargs)
+                if isinstance(value, Response):
+                    return value
+                entry = await response_cache.set(key, encode_response(value), expire,
+                                                 time.perf_counter() - started, cache_tags.get() or set(), started_at)
+                future.set_result(entry)
+                return entry.to_response(request)
+            finally:
+                if not future.done():
+                    future.set_result(None)
+                if response_cache.in_flight.get(key) is future:
+                    del response_cache.in_flight[key]
+
+        return inner
+
+    return wrapper
@@ -0,0 +1,196 @@
+import base64
+import logging
+import secrets
+import smtplib
+import threading
+import time
+from email import message_from_bytes, policy
+from email.message import EmailMessage
+from email.utils import formatdate, make_msgid
+from typing import Callable, Iterable, Iterator
+
+from src.config import SMTP_BACKEND, SMTP_HOST, SMTP_PORT, SMTP_USE_SSL, SMTP_TIMEOUT, SMTP_MAX_IDLE, \
+    SMTP_RATE_LIMIT, SMTP_USER, SMTP_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+BASE64_LINE_BYTES = 57
+BASE64_BLOCK_SIZE = BASE64_LINE_BYTES * 1024
+
+
+class MailDeliveryError(Exception):
+    def __init__(self, sent: int, error: Exception):
+        super().__init__(f"Delivery failed after {sent} messages: {error}")
+        self.sent = sent
+        self.error = error
+
+
+def base64_lines(chunks: Iterable[str]) -> Iterator[bytes]:
+    pending = b""
+    for chunk in chunks:
+        pending += chunk.encode()
+        if len(pending) >= BASE64_BLOCK_SIZE:
+            cut = len(pending) - len(pending) % BASE64_LINE_BYTES
+            yield base64.encodebytes(pending[:cut]).replace(b"\n", b"\r\n")
+            pending = pending[cut:]
+    if pending:
+        yield base64.encodebytes(pending).replace(b"\n", b"\r\n")
+
+
+class MultipartStream:
+    def __init__(self, sender: str, recipient: str, subject: str, text: str, html: Callable[[], Iterable[str]]):
+        self.sender = sender
+        self.recipient = recipient
+        self.subject = subject
+        self.text = text
+        self.html = html
+        self.boundary = f"==============={secrets.token_hex(16)}=="
+        self.date = formatdate()
+        self.message_id = make_msgid()
+
+    def _part_headers(self, content_type: str) -> bytes:
+        return (f"--{self.boundary}\r\n"
+                f"Content-Type: {content_type}; charset=\"utf-8\"\r\n"
+                "Content-Transfer-Encoding: base64\r\n\r\n").encode()
+
+    def __iter__(self) -> Iterator[bytes]:
+        headers = (("From", self.sender), ("To", self.recipient), ("Subject", self.subject),
+                   ("Date", self.date), ("Message-ID", self.message_id), ("MIME-Version", "1.0"),
+                   ("Content-Type", f'multipart/alternative; boundary="{self.boundary}"'))
+        yield "".join(policy.SMTP.fold(name, value) for name, value in headers if value).encode() + b"\r\n"
+        yield self._part_headers("text/plain")
+        yield from base64_lines([self.text])
+        yield self._part_headers("text/html")
+        yield from base64_lines(self.html())
+        yield f"--{self.boundary}--\r\n".encode()
+
+
+def send_stream_data(connection: smtplib.SMTP, message: MultipartStream) -> None:
+    connection.ehlo_or_helo_if_needed()
+    code, response = connection.mail(message.sender or "")
+    if code != 250:
+        connection.rset()
+        raise smtplib.SMTPSenderRefused(code, response, message.sender)
+    code, response = connection.rcpt(message.recipient)
+    if code not in (250, 251):
+        connection.rset()
+        raise smtplib.SMTPRecipientsRefused({message.recipient: (code, response)})
+    code, response = connection.docmd("data")
+    if code != 354:
+        connection.rset()
+        raise smtplib.SMTPDataError(code, response)
+    for chunk in message:
+        connection.send(smtplib.quotedata(chunk.decode("ascii")).encode("ascii"))
+    code, response = connection.docmd(".")
+    if code != 250:
+        raise smtplib.SMTPDataError(code, response)
+
+
+class RateLimiter:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self.updated = time.monotonic()
+                self.tokens = 0
+            else:
+                self.tokens -= 1
+
+
+class SMTPBackend:
+    def __init__(self):
+        self.connection = None
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+        self.rate_limiter = RateLimiter(SMTP_RATE_LIMIT, burst=max(int(SMTP_RATE_LIMIT), 1))
+
+    def _connect(self):
+        smtp_class = smtplib.SMTP_SSL if SMTP_USE_SSL else smtplib.SMTP
+        connection = smtp_class(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT)
+        if SMTP_USER:
+            connection.login(SMTP_USER, SMTP_PASSWORD)
+        return connection
+
+    def _get_connection(self):
+        if self.connection is not None and time.monotonic() - self.last_used > SMTP_MAX_IDLE:
+            try:
+                if self.connection.noop()[0] != 250:
+                    self.close()
+            except smtplib.SMTPException:
+                self.close()
+            except OSError:
+                self.close()
+        if self.connection is None:
+            self.connection = self._connect()
+        return self.connection
+
+    def close(self) -> None:
+        if self.connection is None:
+            return
+        try:
+            self.connection.quit()
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.connection = None
+
+    def _deliver(self, send: Callable, sent: int) -> None:
+        self.rate_limiter.acquire()
+        try:
+            try:
+                send(self._get_connection())
+            except smtplib.SMTPServerDisconnected:
+                self.close()
+                send(self._get_connection())
+        except (smtplib.SMTPException, OSError) as error:
+            self.close()
+            raise MailDeliveryError(sent, error) from error
+        self.last_used = time.monotonic()
+
+    def send_messages(self, messages: list[EmailMessage]) -> int:
+        sent = 0
+        with self.lock:
+            for message in messages:
+                self._deliver(lambda connection: connection.send_message(message), sent)
+                sent += 1
+        return sent
+
+    def send_stream(self, message: MultipartStream) -> None:
+        with self.lock:
+            self._deliver(lambda connection: send_stream_data(connection, message), 0)
+
+
+class MemoryBackend:
+    def __init__(self):
+        self.outbox: list[EmailMessage] = []
+
+    def send_messages(self, messages: list[EmailMessage]) -> int:
+        self.outbox.extend(messages)
+        for message in messages:
+            logger.info("Email to %s: %s", message["To"], message["Subject"])
+        return len(messages)
+
+    def send_stream(self, message: MultipartStream) -> None:
+        self.send_messages([message_from_bytes(b"".join(message), policy=policy.default)])
+
+    def close(self) -> None:
+        pass
+
+
+MAIL_BACKENDS = {
+    "smtp": SMTPBackend,
+    "memory": MemoryBackend,
+}
+
+mail_backend = MAIL_BACKENDS[SMTP_BACKEND]()
@@ -0,0 +1,60 @@
+import hashlib
+import os
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import orjson
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+from src.config import EMAIL_FRAGMENT_CACHE_SIZE, EMAIL_FRAGMENT_CACHE_TTL
+from src.ttl_cache import TTLCache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
+
+def format_deadline(value) -> str:
+    if not value:
+        return "—"
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.strftime("%d.%m.%Y %H:%M")
+
+
+environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR),
+                          autoescape=select_autoescape(["html"]),
+                          auto_reload=False,
+                          trim_blocks=True,
+                          lstrip_blocks=True)
+environment.filters["deadline"] = format_deadline
+fragment_cache = TTLCache(max_size=EMAIL_FRAGMENT_CACHE_SIZE, ttl=EMAIL_FRAGMENT_CACHE_TTL)
+
+
+def compile_templates() -> None:
+    for name in environment.list_templates():
+        environment.get_template(name)
+
+
+def fragment_key(group: dict) -> bytes:
+    return hashlib.blake2b(orjson.dumps(group, option=orjson.OPT_SORT_KEYS, default=str), digest_size=16).digest()
+
+
+def render_group(group: dict) -> Markup:
+    key = fragment_key(group)
+    html = fragment_cache.get(key)
+    if html is None:
+        html = Markup(environment.get_template("dashboard_group.html").render(group=group))
+        fragment_cache.set(key, html)
+    return html
+
+
+def iter_dashboard_html(groups: Iterable[dict]) -> Iterator[str]:
+    return environment.get_template("dashboard.html").generate(fragments=(render_group(group) for group in groups))
+
+
+def render_dashboard_html(groups: Iterable[dict]) -> str:
+    return "".join(iter_dashboard_html(groups))
+
+
+def render_dashboard_text(groups: Iterable[dict]) -> str:
+    return environment.get_template("dashboard.txt").render(groups=groups)
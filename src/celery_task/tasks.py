@@ -1,34 +1,160 @@
-import smtplib
+import os
+from datetime import datetime, timezone
 from email.message import EmailMessage
 
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown
+from celery.utils.log import get_task_logger
+import orjson
+from PIL import Image
+from sqlalchemy import select
 
-from src.config import REDIS_HOST, REDIS_PORT, SMTP_USER, SMTP_PASSWORD
+from src.celery_task.mail import mail_backend, MailDeliveryError, MultipartStream
+from src.celery_task.render import compile_templates, iter_dashboard_html, render_dashboard_html, \
+    render_dashboard_text
+from src.config import REDIS_HOST, REDIS_PORT, SMTP_USER, IMAGE_VARIANT_SIZES, DIGEST_HOUR, \
+    DIGEST_PAGE_SIZE, DIGEST_CHUNK_SIZE, DIGEST_IDEMPOTENCY_TTL
+from src.database import get_sync_session_maker
+from src.redis_client import sync_redis
+from src.tasks.projections import user_groups_query, groups_tasks_query, groups_access_query, \
+    attach_tasks_and_access
+from src.tasks.storage import variant_name
+from src.user.models import User
 
 celery = Celery('tasks', broker=f'redis://{REDIS_HOST}:{REDIS_PORT}')
+logger = get_task_logger(__name__)
 
-SMTP_HOST = "smtp.gmail.com"
-SMTP_PORT = 465
+MAIL_MAX_RETRIES = 5
+MAIL_RETRY_BACKOFF_MAX = 600
+DASHBOARD_CHUNK_SIZE = 500
+DASHBOARD_SUBJECT = 'You Tasks'
 
 
-def get_email_template_dashboard(user_email: str, data: list):
+def build_email(user_email: str, subject: str, html: str) -> EmailMessage:
     email = EmailMessage()
-    email['Subject'] = 'You Tasks'
+    email['Subject'] = subject
     email['From'] = SMTP_USER
     email['To'] = user_email
-    print(data)
-    email.set_content(
-        '<div>'
-        f'<h1 style="color: red;">Здравствуйте, {data}, а вот и ваш отчет. Зацените 😊</h1>'
-        '</div>',
-        subtype='html'
-    )
+    email.set_content(html, subtype='html')
     return email
 
 
-@celery.task
-def send_email_report_dashboard(user_email: str, data: list):
+def get_email_template_dashboard(user_email: str, data: list):
+    return build_email(user_email, DASHBOARD_SUBJECT, render_dashboard_html(data))
+
+
+def get_dashboard_stream(user_email: str, data: list) -> MultipartStream:
+    return MultipartStream(SMTP_USER, user_email, DASHBOARD_SUBJECT, render_dashboard_text(data),
+                           lambda: iter_dashboard_html(data))
+
+
+def retry_countdown(retries: int) -> int:
+    return min(10 * 2 ** retries, MAIL_RETRY_BACKOFF_MAX)
+
+
+@celery.task(bind=True, max_retries=MAIL_MAX_RETRIES)
+def send_email_report_dashboard(self, user_email: str, data: list):
+    data = [orjson.loads(group) if isinstance(group, str) else group for group in data]
     email = get_email_template_dashboard(user_email, data)
-    with smtplib.SMTP_SSL(SMTP_HOST, SMTP_PORT) as server:
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(email)
+    try:
+        mail_backend.send_messages([email])
+    except MailDeliveryError as exc:
+        raise self.retry(exc=exc.error, countdown=retry_countdown(self.request.retries))
+
+
+def load_dashboard_data(user_id: str):
+    with get_sync_session_maker()() as session:
+        user_email = session.execute(select(User.email).where(User.uuid == user_id)).scalar_one_or_none()
+        if user_email is None:
+            return None, []
+        data = []
+        result = session.execute(user_groups_query(user_id).execution_options(yield_per=DASHBOARD_CHUNK_SIZE))
+        for rows in result.partitions():
+            groups = [dict(row._mapping) for row in rows]
+            group_ids = [group["id"] for group in groups]
+            data.extend(attach_tasks_and_access(groups,
+                                                session.execute(groups_tasks_query(group_ids)),
+                                                session.execute(groups_access_query(group_ids))))
+        return user_email, data
+
+
+@celery.task(bind=True, max_retries=MAIL_MAX_RETRIES)
+def send_dashboard_report(self, user_id: str):
+    user_email, data = load_dashboard_data(user_id)
+    if user_email is None:
+        return
+    try:
+        mail_backend.send_stream(get_dashboard_stream(user_email, data))
+    except MailDeliveryError as exc:
+        raise self.retry(exc=exc.error, countdown=retry_countdown(self.request.retries))
+
+
+def digest_key(digest_date: str, user_id: str) -> str:
+    return f"digest-sent:{digest_date}:{user_id}"
+
+
+@celery.task
+def send_digest(user_id: str, digest_date: str, attempt: int = 0):
+    key = digest_key(digest_date, user_id)
+    if not sync_redis.set(key, 1, nx=True, ex=DIGEST_IDEMPOTENCY_TTL):
+        return
+    try:
+        user_email, data = load_dashboard_data(user_id)
+        if data:
+            mail_backend.send_stream(get_dashboard_stream(user_email, data))
+    except Exception:
+        # Runs inside a chunk, so an exception here would skip the remaining users.
+        logger.exception("Digest for %s on %s failed (attempt %d)", user_id, digest_date, attempt)
+        try:
+            sync_redis.delete(key)
+            if attempt < MAIL_MAX_RETRIES:
+                send_digest.apply_async((user_id, digest_date, attempt + 1), countdown=retry_countdown(attempt))
+        except Exception:
+            logger.exception("Could not reschedule the digest for %s on %s", user_id, digest_date)
+
+
+@celery.task
+def schedule_daily_digest(after: str = None, digest_date: str = None):
+    digest_date = digest_date or datetime.now(timezone.utc).date().isoformat()
+    query = select(User.uuid).where(User.is_active == True).order_by(User.uuid).limit(DIGEST_PAGE_SIZE)
+    if after is not None:
+        query = query.where(User.uuid > after)
+    with get_sync_session_maker()() as session:
+        user_ids = [str(user_id) for user_id in session.execute(query).scalars()]
+    if not user_ids:
+        return
+    send_digest.chunks(((user_id, digest_date) for user_id in user_ids), DIGEST_CHUNK_SIZE).group().apply_async()
+    if len(user_ids) == DIGEST_PAGE_SIZE:
+        schedule_daily_digest.delay(user_ids[-1], digest_date)
+
+
+celery.conf.beat_schedule = {
+    'daily-digest': {
+        'task': schedule_daily_digest.name,
+        'schedule': crontab(hour=DIGEST_HOUR, minute=0),
+    },
+}
+celery.conf.timezone = 'UTC'
+
+
+@worker_process_init.connect
+def load_templates(**kwargs):
+    compile_templates()
+
+
+@worker_process_shutdown.connect
+def close_mail_connection(**kwargs):
+    mail_backend.close()
+
+
+@celery.task
+def generate_image_variants(file_path: str):
+    with Image.open(file_path) as image:
+        for variant, size in IMAGE_VARIANT_SIZES.items():
+            variant_path = variant_name(file_path, variant)
+            if os.path.exists(variant_path):
+                continue
+            resized = image.copy()
+            resized.thumbnail((size, size))
+            resized.save(variant_path)
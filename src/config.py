@@ -18,3 +18,49 @@ REDIS_HOST = os.environ.get('REDIS_HOST')
 REDIS_PORT = os.environ.get('REDIS_PORT')
 SMTP_USER = os.environ.get('SMTP_USER')
 SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
+DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'queue')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 100))
+DB_QUERY_CACHE_SIZE = int(os.environ.get('DB_QUERY_CACHE_SIZE', 500))
+DB_ECHO_SAMPLE_RATE = float(os.environ.get('DB_ECHO_SAMPLE_RATE', 0))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 30))
+USER_CACHE_MAX_SIZE = int(os.environ.get('USER_CACHE_MAX_SIZE', 10000))
+USER_CACHE_REDIS_TTL = int(os.environ.get('USER_CACHE_REDIS_TTL', 0))
+PERMISSION_CACHE_TTL = int(os.environ.get('PERMISSION_CACHE_TTL', 0))
+IMAGE_DIR = os.environ.get('IMAGE_DIR', 'src/tasks/images/')
+IMAGE_STORAGE_BACKEND = os.environ.get('IMAGE_STORAGE_BACKEND', 'local')
+IMAGE_MAX_SIZE = int(os.environ.get('IMAGE_MAX_SIZE', 10 * 1024 * 1024))
+IMAGE_VARIANT_SIZES = {'thumb': 256, 'medium': 1024}
+IMAGE_ACCEL_REDIRECT_PREFIX = os.environ.get('IMAGE_ACCEL_REDIRECT_PREFIX')
+TASKS_CACHE_EXPIRE = int(os.environ.get('TASKS_CACHE_EXPIRE', 60 * 60 * 6))
+GROUP_CACHE_EXPIRE = int(os.environ.get('GROUP_CACHE_EXPIRE', 60 * 60 * 6))
+RESPONSE_CACHE_L1_MAX_SIZE = int(os.environ.get('RESPONSE_CACHE_L1_MAX_SIZE', 10000))
+RESPONSE_CACHE_L1_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_L1_MAX_BYTES', 64 * 1024 * 1024))
+RESPONSE_CACHE_L1_TTL = float(os.environ.get('RESPONSE_CACHE_L1_TTL', 60))
+RESPONSE_CACHE_EARLY_REFRESH_BETA = float(os.environ.get('RESPONSE_CACHE_EARLY_REFRESH_BETA', 1.0))
+RESPONSE_CACHE_SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('RESPONSE_CACHE_SINGLE_FLIGHT_TIMEOUT', 10))
+SMTP_BACKEND = os.environ.get('SMTP_BACKEND', 'smtp')
+SMTP_HOST = os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+SMTP_PORT = int(os.environ.get('SMTP_PORT', 465))
+SMTP_USE_SSL = os.environ.get('SMTP_USE_SSL', 'true').lower() == 'true'
+SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT', 30))
+SMTP_MAX_IDLE = float(os.environ.get('SMTP_MAX_IDLE', 60))
+SMTP_RATE_LIMIT = float(os.environ.get('SMTP_RATE_LIMIT', 5))
+DIGEST_HOUR = int(os.environ.get('DIGEST_HOUR', 7))
+DIGEST_PAGE_SIZE = int(os.environ.get('DIGEST_PAGE_SIZE', 1000))
+DIGEST_CHUNK_SIZE = int(os.environ.get('DIGEST_CHUNK_SIZE', 50))
+DIGEST_IDEMPOTENCY_TTL = int(os.environ.get('DIGEST_IDEMPOTENCY_TTL', 60 * 60 * 48))
+EMAIL_FRAGMENT_CACHE_SIZE = int(os.environ.get('EMAIL_FRAGMENT_CACHE_SIZE', 10000))
+EMAIL_FRAGMENT_CACHE_TTL = float(os.environ.get('EMAIL_FRAGMENT_CACHE_TTL', 60 * 60 * 24))
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+TOKEN_CACHE_MAX_SIZE = int(os.environ.get('TOKEN_CACHE_MAX_SIZE', 10000))
+TOKEN_CACHE_TTL = float(os.environ.get('TOKEN_CACHE_TTL', 300))
+TOKEN_REVOCATION_CAPACITY = int(os.environ.get('TOKEN_REVOCATION_CAPACITY', 100000))
+LOOP_MONITOR_ENABLED = os.environ.get('LOOP_MONITOR_ENABLED', 'false').lower() == 'true'
+LOOP_MONITOR_INTERVAL = float(os.environ.get('LOOP_MONITOR_INTERVAL', 0.1))
+LOOP_MONITOR_STALL_THRESHOLD = float(os.environ.get('LOOP_MONITOR_STALL_THRESHOLD', 0.1))
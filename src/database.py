@@ -1,22 +1,122 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
 from typing import AsyncGenerator
 
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, event, create_engine
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 
-from src.config import DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER
+from src.config import DB_HOST, DB_NAME, DB_PASS, DB_PORT, DB_USER, DB_POOL_MODE, DB_POOL_SIZE, DB_MAX_OVERFLOW, \
+    DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE, DB_ECHO_SAMPLE_RATE, \
+    DB_QUERY_CACHE_SIZE
+from src.metrics import record_query
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+SYNC_DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 Base = declarative_base()
 
 metadata = MetaData()
 
-engine = create_async_engine(DATABASE_URL, poolclass=NullPool, echo=True)
+sql_logger = logging.getLogger("src.database.sql")
+if DB_ECHO_SAMPLE_RATE > 0 and not sql_logger.handlers:
+    sql_handler = logging.StreamHandler()
+    sql_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    sql_logger.addHandler(sql_handler)
+    sql_logger.setLevel(logging.INFO)
+echo_sampled: ContextVar[bool] = ContextVar("echo_sampled", default=False)
+
+
+class PoolStats:
+    def __init__(self):
+        self.waiting = 0
+        self.checkouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+
+pool_stats = PoolStats()
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        pool_stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            pool_stats.waiting -= 1
+            pool_stats.checkouts += 1
+            pool_stats.wait_time_total += elapsed
+            pool_stats.wait_time_max = max(pool_stats.wait_time_max, elapsed)
+
+
+def get_engine_kwargs() -> dict:
+    kwargs = {
+        "echo": False,
+        "query_cache_size": DB_QUERY_CACHE_SIZE,
+        "connect_args": {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+    }
+    if DB_POOL_MODE == "null":
+        kwargs["poolclass"] = NullPool
+    else:
+        kwargs.update(poolclass=MeteredQueuePool,
+                      pool_size=DB_POOL_SIZE,
+                      max_overflow=DB_MAX_OVERFLOW,
+                      pool_timeout=DB_POOL_TIMEOUT,
+                      pool_recycle=DB_POOL_RECYCLE,
+                      pool_pre_ping=DB_POOL_PRE_PING)
+    return kwargs
+
+
+engine = create_async_engine(DATABASE_URL, **get_engine_kwargs())
 async_session_maker = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+sync_session_maker = None
+
+
+def get_sync_session_maker() -> sessionmaker:
+    global sync_session_maker
+    if sync_session_maker is None:
+        sync_engine = create_engine(SYNC_DATABASE_URL, pool_size=2, max_overflow=0,
+                                    pool_pre_ping=DB_POOL_PRE_PING, pool_recycle=DB_POOL_RECYCLE)
+        sync_session_maker = sessionmaker(sync_engine, expire_on_commit=False)
+    return sync_session_maker
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def echo_sampled_statement(conn, cursor, statement, parameters, context, executemany):
+    if echo_sampled.get():
+        sql_logger.info("%s %r", statement, parameters)
+    conn.info["query_started"] = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def record_statement(conn, cursor, statement, parameters, context, executemany):
+    record_query(time.perf_counter() - conn.info.pop("query_started", time.perf_counter()))
+
+
+def get_pool_stats() -> dict:
+    pool = engine.sync_engine.pool
+    stats = {
+        "mode": DB_POOL_MODE,
+        "waiting": pool_stats.waiting,
+        "checkouts": pool_stats.checkouts,
+        "wait_time_total": round(pool_stats.wait_time_total, 6),
+        "wait_time_max": round(pool_stats.wait_time_max, 6),
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(size=pool.size(),
+                     checked_out=pool.checkedout(),
+                     checked_in=pool.checkedin(),
+                     overflow=pool.overflow())
+    return stats
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    echo_sampled.set(DB_ECHO_SAMPLE_RATE > 0 and random.random() < DB_ECHO_SAMPLE_RATE)
     async with async_session_maker() as session:
         yield session
@@ -0,0 +1,34 @@
+from sqlalchemy import select, and_, bindparam, Integer
+
+from src.tasks.models import Task, GroupAccess
+from src.tasks.projections import GROUP_LIST_COLUMNS
+from src.user.models import User
+
+# Statements on the per-request path are built once and executed with parameters.
+# Reusing the same object keeps its memoized cache key, so SQLAlchemy goes straight
+# to the compiled cache and asyncpg reuses its prepared statement for the SQL text.
+
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+USER_PASSWORD_HASH = select(User.hashed_password).where(User.username == bindparam("username"))
+
+GROUP_ROLE = (select(GroupAccess.role)
+              .where(and_(GroupAccess.group_id == bindparam("group_id"),
+                          GroupAccess.user_id == bindparam("user_id"),
+                          GroupAccess.access == True))
+              .limit(1))
+
+TASK_ROLE = (select(GroupAccess.role, Task.group_id)
+             .join(Task, Task.group_id == GroupAccess.group_id)
+             .where(and_(Task.id == bindparam("task_id"),
+                         GroupAccess.user_id == bindparam("user_id"),
+                         GroupAccess.access == True))
+             .limit(1))
+
+USER_GROUPS_PAGE = (select(*GROUP_LIST_COLUMNS)
+                    .join(GroupAccess)
+                    .where(and_(GroupAccess.user_id == bindparam("user_id"),
+                                GroupAccess.access == True,
+                                GroupAccess.group_id > bindparam("after", type_=Integer)))
+                    .order_by(GroupAccess.group_id)
+                    .limit(bindparam("limit", type_=Integer)))
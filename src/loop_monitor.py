@@ -0,0 +1,108 @@
+import asyncio
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from src.config import LOOP_MONITOR_INTERVAL, LOOP_MONITOR_STALL_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT_STALLS = 50
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> dict:
+        cumulative, total = {}, 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {"buckets": cumulative, "sum": round(self.sum, 6), "count": self.count, "max": round(self.max, 6)}
+
+
+class LoopMonitor:
+    def __init__(self, interval: float, threshold: float):
+        self.interval = interval
+        self.threshold = threshold
+        self.histogram = Histogram(LAG_BUCKETS)
+        self.stalls = deque(maxlen=RECENT_STALLS)
+        self.routes = {}
+        self.heartbeat = time.monotonic()
+        self.sample: Optional[dict] = None
+        self.loop_thread_id = None
+        self.stopped = threading.Event()
+
+    def register_routes(self, routes) -> None:
+        for route in routes:
+            func = getattr(route, "endpoint", None)
+            while func is not None:
+                if hasattr(func, "__code__"):
+                    self.routes[func.__code__] = route.path
+                func = getattr(func, "__wrapped__", None)
+
+    def describe(self, frame) -> dict:
+        route, location = None, None
+        innermost = f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        while frame is not None:
+            code = frame.f_code
+            if location is None and code.co_filename.startswith(PROJECT_DIR):
+                location = f"{os.path.relpath(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+            if route is None:
+                route = self.routes.get(code)
+            if route is not None and location is not None:
+                break
+            frame = frame.f_back
+        return {"route": route, "location": location or innermost}
+
+    def watch(self) -> None:
+        while not self.stopped.wait(self.threshold / 2):
+            overdue = time.monotonic() - self.heartbeat - self.interval
+            if overdue >= self.threshold and self.sample is None:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                self.sample = self.describe(frame) if frame is not None else {}
+
+    async def run(self) -> None:
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.stopped.clear()
+        threading.Thread(target=self.watch, name="loop-monitor", daemon=True).start()
+        try:
+            while True:
+                started = time.monotonic()
+                await asyncio.sleep(self.interval)
+                self.heartbeat = time.monotonic()
+                lag = max(self.heartbeat - started - self.interval, 0.0)
+                self.histogram.observe(lag)
+                if lag >= self.threshold:
+                    stall = {"lag": round(lag, 6), **(self.sample or {})}
+                    self.stalls.append(stall)
+                    logger.warning("Event loop blocked for %.3fs in %s (%s)", lag, stall.get("route"),
+                                   stall.get("location"))
+                self.sample = None
+        finally:
+            self.stopped.set()
+
+    def stats(self) -> dict:
+        return {"lag": self.histogram.snapshot(), "stalls": list(self.stalls)}
+
+
+loop_monitor = LoopMonitor(LOOP_MONITOR_INTERVAL, LOOP_MONITOR_STALL_THRESHOLD)
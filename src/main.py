@@ -1,19 +1,27 @@
-import time
+import asyncio
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from starlette.responses import Response
 
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from fastapi_cache.decorator import cache
 
-from src.config import REDIS_HOST, REDIS_PORT
+from src.cache import response_cache
+from src.config import LOOP_MONITOR_ENABLED
+from src.database import get_pool_stats
+from src.loop_monitor import loop_monitor
+from src.metrics import MetricsMiddleware
+from src.redis_client import redis
 from src.tasks.router import router as router_tasks
 from src.user.router import router as user_router
 from src.celery_task.router import router as celery_router
+from src.user.tokens import revocation_list
 
-from redis import asyncio as aioredis
-
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(router_tasks)
 app.include_router(user_router)
@@ -28,11 +36,37 @@ async def get_cache():
 @app.get("/")
 @cache(expire=60)
 async def index():
-    time.sleep(5)
     return dict(hello="world")
 
 
+@app.get("/pool/stats")
+async def pool_stats():
+    return get_pool_stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/loop/stats")
+async def loop_stats():
+    return {"enabled": LOOP_MONITOR_ENABLED, **loop_monitor.stats()}
+
+
 @app.on_event("startup")
 async def startup():
-    redis = aioredis.from_url(f"redis://{REDIS_HOST}:{REDIS_PORT}")
-    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
\ No newline at end of file
+    FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+    app.state.cache_listener = asyncio.create_task(response_cache.listen_invalidations())
+    app.state.revocation_listener = asyncio.create_task(revocation_list.listen())
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.register_routes(app.routes)
+        app.state.loop_monitor = asyncio.create_task(loop_monitor.run())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.cache_listener.cancel()
+    app.state.revocation_listener.cancel()
+    if LOOP_MONITOR_ENABLED:
+        app.state.loop_monitor.cancel()
\ No newline at end of file
@@ -0,0 +1,127 @@
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import HistogramMetricFamily
+from starlette.datastructures import MutableHeaders
+
+from src.loop_monitor import loop_monitor
+from src.query_budgets import get_query_budget
+
+logger = logging.getLogger(__name__)
+
+request_metrics: ContextVar[Optional["RequestMetrics"]] = ContextVar("request_metrics", default=None)
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency", ["method", "route", "status"])
+REQUEST_QUERIES = Histogram("http_request_db_queries", "SQL statements per request", ["route"],
+                            buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float("inf")))
+REQUEST_DB_TIME = Histogram("http_request_db_seconds", "Time spent in SQL statements per request", ["route"])
+RESPONSE_SIZE = Histogram("http_response_size_bytes", "Response body size", ["route"],
+                          buckets=(128, 1024, 8192, 65536, 524288, 4194304, 33554432, float("inf")))
+CACHE_REQUESTS = Counter("http_response_cache", "Response cache lookups", ["route", "result"])
+CACHE_TIER_LOOKUPS = Counter("response_cache_tier_lookups", "Response cache lookups by the tier that answered",
+                             ["tier"])
+QUERY_BUDGET_EXCEEDED = Counter("http_request_query_budget_exceeded", "Requests over their route's SQL budget",
+                                ["route"])
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db_time", "cache", "query_allowance")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache = None
+        self.query_allowance = 0
+
+
+def record_query(elapsed: float) -> None:
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_time += elapsed
+
+
+def record_cache(result: str) -> None:
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.cache = result
+
+
+def allow_queries(count: int) -> None:
+    metrics = request_metrics.get()
+    if metrics is not None:
+        metrics.query_allowance += count
+
+
+def check_query_budget(method: str, path: str, metrics: RequestMetrics) -> None:
+    budget = get_query_budget(method, path)
+    if budget is None or metrics.queries <= budget + metrics.query_allowance:
+        return
+    QUERY_BUDGET_EXCEEDED.labels(path).inc()
+    logger.warning("%s %s ran %d SQL statements, budget is %d", method, path, metrics.queries,
+                   budget + metrics.query_allowance)
+
+
+def server_timing(metrics: RequestMetrics, elapsed: float) -> str:
+    timings = [f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+               f"app;dur={elapsed * 1000:.2f}"]
+    if metrics.cache is not None:
+        timings.append(f"cache;desc={metrics.cache}")
+    return ", ".join(timings)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+        metrics = RequestMetrics()
+        token = request_metrics.set(metrics)
+        started = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                headers = MutableHeaders(scope=message)
+                if metrics.cache is None and "x-fastapi-cache" in headers:
+                    metrics.cache = headers["x-fastapi-cache"].lower()
+                headers.append("Server-Timing", server_timing(metrics, time.perf_counter() - started))
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            request_metrics.reset(token)
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], path, response["status"]).observe(time.perf_counter() - started)
+            REQUEST_QUERIES.labels(path).observe(metrics.queries)
+            REQUEST_DB_TIME.labels(path).observe(metrics.db_time)
+            RESPONSE_SIZE.labels(path).observe(response["size"])
+            if metrics.cache is not None:
+                CACHE_REQUESTS.labels(path, metrics.cache).inc()
+            check_query_budget(scope["method"], path, metrics)
+
+
+class LoopLagCollector:
+    def collect(self):
+        histogram = loop_monitor.histogram
+        buckets, total = [], 0
+        for bound, count in zip((*histogram.buckets, float("inf")), histogram.counts):
+            total += count
+            buckets.append((str(bound) if bound != float("inf") else "+Inf", total))
+        family = HistogramMetricFamily("event_loop_lag_seconds", "Event loop wake-up delay")
+        family.add_metric([], buckets, histogram.sum)
+        yield family
+
+
+REGISTRY.register(LoopLagCollector())
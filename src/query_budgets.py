@@ -0,0 +1,36 @@
+from typing import Optional
+
+# Maximum SQL statements per request with cold user and permission caches and
+# the response cache bypassed. Keep these tight: tests/test_query_budgets.py
+# fails when a route goes over, and the metrics middleware logs it in production.
+QUERY_BUDGETS = {
+    ("GET", "/tasks/tasks/get"): 5,
+    ("GET", "/tasks/tasks/export"): 3,
+    ("POST", "/tasks/task/add"): 3,
+    ("POST", "/tasks/task/bulk/add"): 3,
+    ("PATCH", "/tasks/task/bulk/update"): 3,
+    ("POST", "/tasks/task/bulk/delete"): 3,
+    ("POST", "/tasks/image"): 3,
+    ("GET", "/tasks/image/{name}"): 0,
+    ("HEAD", "/tasks/image/{name}"): 0,
+    ("DELETE", "/tasks/task/delete/{task}"): 3,
+    ("PATCH", "/tasks/task/update"): 3,
+    ("GET", "/tasks/group/get"): 2,
+    ("POST", "/tasks/group/add"): 3,
+    ("DELETE", "/tasks/group/delete/{group}"): 8,
+    ("PATCH", "/tasks/group/update"): 3,
+    ("GET", "/tasks/group/users"): 3,
+    ("POST", "/tasks/group/add/users"): 3,
+    ("DELETE", "/tasks/group/delete/user/{user_id}"): 4,
+    ("PATCH", "/tasks/group/update/user"): 3,
+    ("POST", "/signup"): 2,
+    ("POST", "/login"): 1,
+    ("POST", "/refresh"): 0,
+    ("POST", "/logout"): 0,
+    ("GET", "/me"): 1,
+    ("GET", "/email/dashboard"): 1,
+}
+
+
+def get_query_budget(method: str, path: str) -> Optional[int]:
+    return QUERY_BUDGETS.get((method, path))
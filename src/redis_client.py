@@ -0,0 +1,6 @@
+from redis import Redis, asyncio as aioredis
+
+from src.config import REDIS_HOST, REDIS_PORT
+
+redis = aioredis.from_url(f"redis://{REDIS_HOST}:{REDIS_PORT}")
+sync_redis = Redis.from_url(f"redis://{REDIS_HOST}:{REDIS_PORT}")
@@ -0,0 +1,113 @@
+from sqlalchemy import insert, update, delete, select, values, column, cast, any_, bindparam, ARRAY, Integer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import invalidate_cache_tags, group_tag
+from src.metrics import allow_queries
+from src.tasks.models import Task, Role
+from src.tasks.permissions import get_group_roles, get_task_roles, has_role
+from src.tasks.schemas import TaskCreate, TaskBulkUpdate, BulkItemResult
+
+
+CREATE_FIELDS = tuple(TaskCreate.model_fields)
+
+
+def _denied(index: int, role, task_id: int = None) -> BulkItemResult:
+    if role is None:
+        return BulkItemResult(index=index, id=task_id, status="error", detail="Group not found")
+    return BulkItemResult(index=index, id=task_id, status="error", detail="You don't have permission")
+
+
+async def bulk_create_tasks(tasks: list[TaskCreate], session: AsyncSession, user) -> list[BulkItemResult]:
+    roles = await get_group_roles([task.group_id for task in tasks], session, user)
+    results = {}
+    allowed = []
+    for index, task in enumerate(tasks):
+        role = roles[task.group_id]
+        if has_role(role, Role.admin):
+            allowed.append(index)
+        else:
+            results[index] = _denied(index, role)
+    if allowed:
+        # RETURNING order is not guaranteed, but ids come from the sequence in the order the
+        # SELECT feeds rows to the insert, so sorting them recovers the ordinal order.
+        rows = values(column("ordinal", Integer),
+                      *[column(field, Task.__table__.c[field].type) for field in CREATE_FIELDS],
+                      name="new_tasks").data([(ordinal, *[getattr(tasks[index], field) for field in CREATE_FIELDS])
+                                              for ordinal, index in enumerate(allowed)])
+        stmt = (insert(Task)
+                .from_select(CREATE_FIELDS,
+                             select(*[cast(rows.c[field], Task.__table__.c[field].type) for field in CREATE_FIELDS])
+                             .order_by(rows.c.ordinal))
+                .returning(Task.id))
+        ids = sorted((await session.execute(stmt)).scalars().all())
+        await session.commit()
+        await invalidate_cache_tags(*{group_tag(tasks[index].group_id) for index in allowed})
+        for index, task_id in zip(allowed, ids):
+            results[index] = BulkItemResult(index=index, id=task_id, status="success")
+    return [results[index] for index in range(len(tasks))]
+
+
+async def bulk_update_tasks(tasks: list[TaskBulkUpdate], session: AsyncSession, user) -> list[BulkItemResult]:
+    roles = await get_task_roles([task.id for task in tasks], session, user)
+    results = {}
+    batches = {}
+    for index, task in enumerate(tasks):
+        if task.id not in roles:
+            results[index] = BulkItemResult(index=index, id=task.id, status="error", detail="Task not found")
+            continue
+        role = roles[task.id][0]
+        if not has_role(role, Role.manager):
+            results[index] = _denied(index, role, task.id)
+            continue
+        update_data = task.dict(exclude_unset=True, exclude={"id"})
+        if not update_data:
+            results[index] = BulkItemResult(index=index, id=task.id, status="success")
+            continue
+        batches.setdefault(tuple(sorted(update_data)), []).append((index, task.id, update_data))
+    allow_queries(max(len(batches) - 1, 0))
+    for fields, items in batches.items():
+        rows = values(column("id", Integer),
+                      *[column(field, Task.__table__.c[field].type) for field in fields],
+                      name="new_values").data([(task_id, *[data[field] for field in fields])
+                                               for _, task_id, data in items])
+        stmt = (update(Task)
+                .where(Task.id == rows.c.id)
+                .values({field: cast(rows.c[field], Task.__table__.c[field].type) for field in fields}))
+        await session.execute(stmt)
+        for index, task_id, _ in items:
+            results[index] = BulkItemResult(index=index, id=task_id, status="success")
+    if batches:
+        await session.commit()
+        group_ids = set()
+        for items in batches.values():
+            for _, task_id, data in items:
+                group_ids.update({roles[task_id][1], data.get("group_id", roles[task_id][1])})
+        await invalidate_cache_tags(*[group_tag(group_id) for group_id in group_ids])
+    return [results[index] for index in range(len(tasks))]
+
+
+async def bulk_delete_tasks(ids: list[int], session: AsyncSession, user) -> list[BulkItemResult]:
+    roles = await get_task_roles(ids, session, user)
+    results = {}
+    allowed = []
+    for index, task_id in enumerate(ids):
+        if task_id not in roles:
+            results[index] = BulkItemResult(index=index, id=task_id, status="error", detail="Task not found")
+        elif not has_role(roles[task_id][0], Role.admin):
+            results[index] = _denied(index, roles[task_id][0], task_id)
+        else:
+            allowed.append(index)
+    if allowed:
+        stmt = (delete(Task)
+                .where(Task.id == any_(bindparam("ids", [ids[index] for index in allowed], type_=ARRAY(Integer))))
+                .returning(Task.id))
+        deleted = set((await session.execute(stmt)).scalars().all())
+        await session.commit()
+        await invalidate_cache_tags(*{group_tag(roles[ids[index]][1]) for index in allowed})
+        for index in allowed:
+            if ids[index] in deleted:
+                results[index] = BulkItemResult(index=index, id=ids[index], status="success")
+            else:
+                results[index] = BulkItemResult(index=index, id=ids[index], status="error",
+                                                detail="Task not found")
+    return [results[index] for index in range(len(ids))]
@@ -0,0 +1,51 @@
+import csv
+import io
+import json
+from typing import AsyncIterator
+
+from sqlalchemy import select
+
+from src.database import async_session_maker
+from src.tasks.models import Task
+
+EXPORT_COLUMNS = ("id", "name", "description", "completed", "photo", "deadlines", "group_id")
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _row_values(row) -> list:
+    return [value.isoformat() if key == "deadlines" and value is not None else value
+            for key, value in zip(EXPORT_COLUMNS, row)]
+
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(json.dumps(dict(zip(EXPORT_COLUMNS, _row_values(row))), ensure_ascii=False) + "\n"
+                   for row in rows)
+
+
+def _csv_chunk(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(_row_values(row) for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_group_tasks(group_id: int, export_format: str) -> AsyncIterator[str]:
+    query = (select(*[getattr(Task, column) for column in EXPORT_COLUMNS])
+             .where(Task.group_id == group_id)
+             .order_by(Task.id)
+             .execution_options(yield_per=EXPORT_CHUNK_SIZE))
+    if export_format == "csv":
+        yield _csv_chunk([], header=True)
+    async with async_session_maker() as session:
+        result = await session.stream(query)
+        async for rows in result.partitions(EXPORT_CHUNK_SIZE):
+            if export_format == "csv":
+                yield _csv_chunk(rows)
+            else:
+                yield _ndjson_chunk(rows)
@@ -0,0 +1,114 @@
+import mimetypes
+import os
+import re
+import stat
+import typing
+
+import anyio
+from anyio import to_thread
+from fastapi import HTTPException
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.config import IMAGE_ACCEL_REDIRECT_PREFIX
+from src.tasks.storage import storage
+
+SAFE_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9._-]*$")
+CONTENT_ADDRESSED_NAME = re.compile(r"^(?P<hash>[0-9a-f]{64})(?P<variant>_[a-z]+)?\.[a-z]+$")
+RANGE_HEADER = re.compile(r"^bytes=(?P<start>\d*)-(?P<end>\d*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ImageFileResponse(Response):
+    def __init__(self, path: str, status_code: int, headers: dict, offset: int = 0, count: int = 0,
+                 send_body: bool = True, background: typing.Optional[BackgroundTask] = None):
+        super().__init__(status_code=status_code, headers=headers, background=background)
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or not self.count:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopy" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({"type": "http.response.zerocopy", "file": file.fileno(),
+                            "offset": self.offset, "count": self.count, "more_body": False})
+        else:
+            async with await anyio.open_file(self.path, "rb") as file:
+                await file.seek(self.offset)
+                remaining = self.count
+                while remaining:
+                    chunk = await file.read(min(READ_CHUNK_SIZE, remaining))
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": bool(remaining and chunk)})
+                    if not chunk:
+                        break
+        if self.background is not None:
+            await self.background()
+
+
+def get_etag(name: str, file_stat: os.stat_result) -> str:
+    match = CONTENT_ADDRESSED_NAME.match(name)
+    if match:
+        return f'"{match.group("hash")}{match.group("variant") or ""}"'
+    return f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+
+
+def parse_range(range_header: str, size: int) -> typing.Optional[tuple[int, int]]:
+    match = RANGE_HEADER.match(range_header.strip())
+    if not match or not (match.group("start") or match.group("end")):
+        return None
+    if not match.group("start"):
+        length = int(match.group("end"))
+        start, end = max(size - length, 0), size - 1
+    else:
+        start = int(match.group("start"))
+        end = min(int(match.group("end")), size - 1) if match.group("end") else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    return any(tag.strip() in (etag, f"W/{etag}", "*") for tag in if_none_match.split(","))
+
+
+async def serve_image(name: str, request: Request) -> Response:
+    if not SAFE_NAME.match(name):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = storage.path(name)
+    try:
+        file_stat = await to_thread.run_sync(os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise HTTPException(status_code=404, detail="Image not found")
+    etag = get_etag(name, file_stat)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if CONTENT_ADDRESSED_NAME.match(name) else MUTABLE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    headers["Content-Type"] = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    if IMAGE_ACCEL_REDIRECT_PREFIX:
+        headers["X-Accel-Redirect"] = IMAGE_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + name
+        return Response(headers=headers)
+    status_code, offset, count = 200, 0, file_stat.st_size
+    byte_range = None
+    if request.headers.get("range") and etag_matches(request.headers.get("if-range", etag), etag):
+        byte_range = parse_range(request.headers["range"], file_stat.st_size)
+    if byte_range is not None:
+        status_code, offset, count = 206, byte_range[0], byte_range[1] - byte_range[0] + 1
+        headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{file_stat.st_size}"
+    headers["Content-Length"] = str(count)
+    return ImageFileResponse(path, status_code, headers, offset, count, send_body=request.method != "HEAD")
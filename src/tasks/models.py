@@ -1,6 +1,6 @@
 import enum
 
-from sqlalchemy import Column, Integer, String, LargeBinary, Boolean, DateTime, ForeignKey, UUID, Enum
+from sqlalchemy import Column, Integer, String, LargeBinary, Boolean, DateTime, ForeignKey, UUID, Enum, Index, text
 from sqlalchemy.orm import relationship, Mapped
 
 from src.database import Base
@@ -19,6 +19,11 @@ class Task(Base):
 
     group_tasks = relationship("GroupTasks", back_populates="tasks")
 
+    __table_args__ = (
+        Index("ix_task_group_deadlines_id", "group_id", "deadlines", "id"),
+        Index("ix_task_group_name", "group_id", "name", postgresql_ops={"name": "text_pattern_ops"}),
+    )
+
 
 class GroupTasks(Base):
     __tablename__ = "group_tasks"
@@ -49,3 +54,9 @@ class GroupAccess(Base):
 
     user = relationship("User", back_populates="access")
     group = relationship("GroupTasks", back_populates="access")
+
+    __table_args__ = (
+        Index("ix_group_access_user_group_active", "user_id", "group_id",
+              postgresql_include=["role"], postgresql_where=text("access")),
+        Index("ix_group_access_group_id", "group_id", "id"),
+    )
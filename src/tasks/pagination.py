@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+from src.tasks.models import Task
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def task_cursor(task: dict) -> str:
+    return encode_cursor(task["deadlines"], task["id"])
+
+
+def tasks_after(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    values = decode_cursor(cursor)
+    if len(values) != 2 or not isinstance(values[1], int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    deadlines, task_id = values
+    if deadlines is None:
+        return and_(Task.deadlines.is_(None), Task.id > task_id)
+    try:
+        deadlines = datetime.fromisoformat(deadlines)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return or_(Task.deadlines > deadlines,
+               and_(Task.deadlines == deadlines, Task.id > task_id),
+               Task.deadlines.is_(None))
+
+
+def id_after(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    values = decode_cursor(cursor)
+    if len(values) != 1 or not isinstance(values[0], int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values[0]
@@ -1,72 +1,136 @@
+from typing import Optional
+
 from fastapi import HTTPException
+from redis.exceptions import RedisError
 from sqlalchemy import select, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.tasks.models import GroupTasks, GroupAccess, Task
-from src.tasks.schemas import GroupGet
-
-
-async def is_success_role_admin(group_id: int, role, session: AsyncSession,
-                                user):
-    query = (select(GroupTasks.id,
-                    GroupTasks.name,
-                    GroupTasks.owner,
-                    GroupAccess.role,
-                    GroupAccess.user_id)
-             .join(GroupAccess)
-             .where(and_(GroupTasks.id == group_id,
-                         GroupAccess.user_id == user.id,
-                         GroupAccess.access == True)))
-    result = await session.execute(query)
-    result_models = result.unique().all()
-    result = [GroupGet.model_validate(row, from_attributes=True) for row in result_models]
-    if not result:
-        raise HTTPException(status_code=404, detail="Group not found")
-    if result[0].role != role:
-        raise HTTPException(status_code=403, detail="You don't have permission")
-    return result
-
-
-async def is_success_role_admin_or_manager_for_task(task_id: int, role,
-                                                    session: AsyncSession,
-                                                    user):
-    query = (select(GroupTasks.id,
-                    GroupTasks.name,
-                    GroupTasks.owner,
-                    GroupAccess.role,
-                    GroupAccess.user_id)
-             .join(GroupAccess)
-             .join(Task)
-             .where(and_(GroupAccess.user_id == user.id,
-                         Task.id == task_id,
-                         GroupAccess.access == True)))
-    result = await session.execute(query)
-    result_models = result.unique().all()
-    result = [GroupGet.model_validate(row, from_attributes=True) for row in result_models]
-    if not result:
-        raise HTTPException(status_code=404, detail="Group not found")
-    if result[0].role == role:
-        raise HTTPException(status_code=403, detail="You don't have permission")
-    return result
-
-
-async def is_success_role_admin_or_manager_for_group(group_id: int, role,
-                                                     session: AsyncSession,
-                                                     user):
-    query = (select(GroupTasks.id,
-                    GroupTasks.name,
-                    GroupTasks.owner,
-                    GroupAccess.role,
-                    GroupAccess.user_id)
-             .join(GroupAccess)
-             .where(and_(GroupTasks.id == group_id,
-                         GroupAccess.user_id == user.id,
-                         GroupAccess.access == True)))
-    result = await session.execute(query)
-    result_models = result.unique().all()
-    result = [GroupGet.model_validate(row, from_attributes=True) for row in result_models]
-    if not result:
+from src.config import PERMISSION_CACHE_TTL
+from src.hot_queries import GROUP_ROLE, TASK_ROLE
+from src.redis_client import redis
+from src.tasks.models import GroupAccess, Task, Role
+
+ROLE_LEVELS = {Role.user: 0, Role.manager: 1, Role.admin: 2}
+REDIS_KEY_PREFIX = "group-roles:"
+
+
+def _memo(session: AsyncSession) -> dict:
+    return session.info.setdefault("group_roles", {})
+
+
+async def _get_cached_role(group_id: int, user_id) -> Optional[Role]:
+    if not PERMISSION_CACHE_TTL:
+        return None
+    try:
+        raw = await redis.hget(f"{REDIS_KEY_PREFIX}{group_id}", str(user_id))
+    except RedisError:
+        return None
+    return Role(raw.decode()) if raw is not None else None
+
+
+async def _set_cached_role(group_id: int, user_id, role: Role) -> None:
+    if not PERMISSION_CACHE_TTL:
+        return
+    key = f"{REDIS_KEY_PREFIX}{group_id}"
+    try:
+        async with redis.pipeline(transaction=False) as pipe:
+            await pipe.hset(key, str(user_id), role.value).expire(key, PERMISSION_CACHE_TTL).execute()
+    except RedisError:
+        pass
+
+
+async def invalidate_group_roles(session: AsyncSession, group_id: int, user_id=None) -> None:
+    memo = _memo(session)
+    memo.pop(("group", group_id), None)
+    for key in [key for key, value in memo.items() if key[0] == "task" and value[1] == group_id]:
+        memo.pop(key)
+    if not PERMISSION_CACHE_TTL:
+        return
+    try:
+        if user_id is None:
+            await redis.delete(f"{REDIS_KEY_PREFIX}{group_id}")
+        else:
+            await redis.hdel(f"{REDIS_KEY_PREFIX}{group_id}", str(user_id))
+    except RedisError:
+        pass
+
+
+async def get_group_role(group_id: int, session: AsyncSession, user) -> Optional[Role]:
+    memo = _memo(session)
+    key = ("group", group_id)
+    if key in memo:
+        return memo[key][0]
+    role = await _get_cached_role(group_id, user.id)
+    if role is None:
+        result = await session.execute(GROUP_ROLE, {"group_id": group_id, "user_id": user.id})
+        role = result.scalar_one_or_none()
+        if role is not None:
+            await _set_cached_role(group_id, user.id, role)
+    memo[key] = (role, group_id)
+    return role
+
+
+async def get_task_role(task_id: int, session: AsyncSession, user) -> tuple[Optional[Role], Optional[int]]:
+    memo = _memo(session)
+    key = ("task", task_id)
+    if key in memo:
+        return memo[key]
+    row = (await session.execute(TASK_ROLE, {"task_id": task_id, "user_id": user.id})).first()
+    role, group_id = (row.role, row.group_id) if row is not None else (None, None)
+    memo[key] = (role, group_id)
+    if group_id is not None:
+        memo[("group", group_id)] = (role, group_id)
+        await _set_cached_role(group_id, user.id, role)
+    return role, group_id
+
+
+async def get_group_roles(group_ids, session: AsyncSession, user) -> dict:
+    memo = _memo(session)
+    roles = {group_id: memo[("group", group_id)][0] for group_id in group_ids if ("group", group_id) in memo}
+    missing = [group_id for group_id in set(group_ids) if group_id not in roles]
+    if missing:
+        query = (select(GroupAccess.group_id, GroupAccess.role)
+                 .where(and_(GroupAccess.group_id.in_(missing),
+                             GroupAccess.user_id == user.id,
+                             GroupAccess.access == True)))
+        found = {row.group_id: row.role for row in (await session.execute(query)).all()}
+        for group_id in missing:
+            roles[group_id] = found.get(group_id)
+            memo[("group", group_id)] = (roles[group_id], group_id)
+    return roles
+
+
+async def get_task_roles(task_ids, session: AsyncSession, user) -> dict:
+    query = (select(Task.id, Task.group_id, GroupAccess.role)
+             .outerjoin(GroupAccess, and_(GroupAccess.group_id == Task.group_id,
+                                          GroupAccess.user_id == user.id,
+                                          GroupAccess.access == True))
+             .where(Task.id.in_(set(task_ids))))
+    memo = _memo(session)
+    roles = {}
+    for row in (await session.execute(query)).all():
+        roles[row.id] = (row.role, row.group_id)
+        memo[("task", row.id)] = roles[row.id]
+    return roles
+
+
+def has_role(role: Optional[Role], required: Role) -> bool:
+    return role is not None and ROLE_LEVELS[role] >= ROLE_LEVELS[required]
+
+
+def ensure_role(role: Optional[Role], required: Role) -> Role:
+    if role is None:
         raise HTTPException(status_code=404, detail="Group not found")
-    if result[0].role == role:
+    if not has_role(role, required):
         raise HTTPException(status_code=403, detail="You don't have permission")
-    return result
+    return role
+
+
+async def check_group_role(group_id: int, required: Role, session: AsyncSession, user) -> Role:
+    return ensure_role(await get_group_role(group_id, session, user), required)
+
+
+async def check_task_role(task_id: int, required: Role, session: AsyncSession, user) -> int:
+    role, group_id = await get_task_role(task_id, session, user)
+    ensure_role(role, required)
+    return group_id
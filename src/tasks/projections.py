@@ -0,0 +1,52 @@
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.tasks.models import Task, GroupTasks, GroupAccess
+
+GROUP_COLUMNS = (GroupTasks.id, GroupTasks.name, GroupTasks.owner)
+GROUP_LIST_COLUMNS = (*GROUP_COLUMNS, GroupAccess.role)
+TASK_LIST_COLUMNS = (Task.id, Task.name, Task.completed, Task.deadlines)
+ACCESS_LIST_COLUMNS = (GroupAccess.id, GroupAccess.user_id, GroupAccess.access)
+
+
+def rows_to_dicts(result) -> list[dict]:
+    keys = [str(key) for key in result.keys()]
+    return [dict(zip(keys, row)) for row in result]
+
+
+def user_groups_query(user_id):
+    return (select(*GROUP_COLUMNS)
+            .join(GroupAccess)
+            .where(and_(GroupAccess.user_id == user_id,
+                        GroupAccess.access == True))
+            .order_by(GroupTasks.id))
+
+
+def groups_tasks_query(group_ids: list):
+    return (select(Task.group_id, *TASK_LIST_COLUMNS)
+            .where(Task.group_id.in_(group_ids))
+            .order_by(Task.group_id, Task.id))
+
+
+def groups_access_query(group_ids: list):
+    return (select(GroupAccess.group_id, *ACCESS_LIST_COLUMNS)
+            .where(GroupAccess.group_id.in_(group_ids))
+            .order_by(GroupAccess.group_id, GroupAccess.id))
+
+
+def attach_tasks_and_access(groups: list[dict], tasks, access) -> list[dict]:
+    by_id = {group["id"]: {**group, "tasks": [], "access": []} for group in groups}
+    for group_id, *values in tasks:
+        by_id[group_id]["tasks"].append(dict(zip(("id", "name", "completed", "deadlines"), values)))
+    for group_id, *values in access:
+        by_id[group_id]["access"].append(dict(zip(("id", "user_id", "access"), values)))
+    return list(by_id.values())
+
+
+async def load_groups_with_tasks(session: AsyncSession, groups: list[dict]) -> list[dict]:
+    group_ids = [group["id"] for group in groups]
+    if not group_ids:
+        return []
+    tasks = await session.execute(groups_tasks_query(group_ids))
+    access = await session.execute(groups_access_query(group_ids))
+    return attach_tasks_and_access(groups, tasks, access)
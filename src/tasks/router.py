@@ -1,26 +1,36 @@
 import os
 import time
+from datetime import datetime
 from functools import wraps
+from typing import Optional, Literal
 from uuid import UUID
 
-from fastapi.openapi.models import Response
 from fastapi_cache.backends import redis
-from fastapi_cache.decorator import cache
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from sqlalchemy import select, insert, update, and_
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Query
+from sqlalchemy import select, insert, update, delete, and_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
 
+from src.cache import cached, build_cache_key, start_cache_tags, tag_cache, invalidate_cache_tags, group_tag, user_tag
+from src.celery_task.tasks import generate_image_variants
+from src.config import TASKS_CACHE_EXPIRE, GROUP_CACHE_EXPIRE
 from src.database import get_async_session
+from src.hot_queries import USER_GROUPS_PAGE
 from src.tasks.models import Task, GroupTasks, GroupAccess, Role
-from src.tasks.schemas import TaskCreate, GroupCreate, TaskUpdate, GroupUpdate, GroupGetWithTask, GroupGet, \
-    AccessGroupUpdate, AccessGroupPost
+from src.tasks.schemas import TaskCreate, GroupCreate, TaskUpdate, GroupUpdate, \
+    AccessGroupUpdate, AccessGroupPost, GroupGetWithTaskPage, GroupPage, \
+    TaskBulkCreateRequest, TaskBulkUpdateRequest, TaskBulkDeleteRequest, BulkItemResult, GroupAccessGet, \
+    StatusResponse, ImageUploadResponse
+from src.tasks.pagination import encode_cursor, task_cursor, tasks_after, id_after
+from src.tasks.export import stream_group_tasks, EXPORT_MEDIA_TYPES
+from src.tasks.bulk import bulk_create_tasks, bulk_update_tasks, bulk_delete_tasks
+from src.tasks.storage import save_image
+from src.tasks.projections import GROUP_COLUMNS, TASK_LIST_COLUMNS, ACCESS_LIST_COLUMNS, \
+    rows_to_dicts
+from src.tasks.media import serve_image
 from src.user.deps import get_current_user
-from src.tasks.permissions import is_success_role_admin, is_success_role_admin_or_manager_for_task, \
-    is_success_role_admin_or_manager_for_group
-
-IMAGEDIR = 'src/tasks/images/'
+from src.tasks.permissions import check_group_role, check_task_role, get_group_role, invalidate_group_roles
 
 router = APIRouter(
     prefix="/tasks",
@@ -36,68 +46,131 @@ def request_key_builder(
 ):
     info = kwargs.get('kwargs')
     user = info.get('user')
-    print(kwargs)
-    print(user.id)
-    return (f":{namespace} {request.method.lower()} {request.url.path} {repr(sorted(request.query_params.items()))}"
-            f"[('user_id', '{user.id}')]")
-
-
-@router.get("/tasks/get")
-@cache(expire=60, key_builder=request_key_builder)
-async def get_tasks(group_id: int, session: AsyncSession = Depends(get_async_session),
+    start_cache_tags(user_tag(user.id))
+    return build_cache_key(namespace, request.url.path, sorted(request.query_params.multi_items()), user.id)
+
+
+@router.get("/tasks/get", response_model=GroupGetWithTaskPage)
+@cached(expire=TASKS_CACHE_EXPIRE, key_builder=request_key_builder)
+async def get_tasks(group_id: int,
+                    cursor: Optional[str] = None,
+                    limit: int = Query(50, ge=1, le=500),
+                    completed: Optional[bool] = None,
+                    deadline_from: Optional[datetime] = None,
+                    deadline_to: Optional[datetime] = None,
+                    name_prefix: Optional[str] = None,
+                    session: AsyncSession = Depends(get_async_session),
                     user=Depends(get_current_user)):
-    query = (select(GroupTasks)
-             .options(selectinload(GroupTasks.tasks))
-             .options(selectinload(GroupTasks.access))
-             .where(GroupTasks.id == group_id))
-    response = await session.execute(query)
-    result_models = response.unique().scalars().all()
-    result = [GroupGetWithTask.model_validate(row, from_attributes=True) for row in result_models]
-    if user.id in [user_access.user_id for user_access in result[0].access if user_access.access == True]:
-        return result
-    else:
+    if await get_group_role(group_id, session, user) is None:
         raise HTTPException(status_code=403, detail="You don't have permission")
+    tag_cache(group_tag(group_id))
+    response = await session.execute(select(*GROUP_COLUMNS).where(GroupTasks.id == group_id))
+    group = response.first()
+    if group is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    filters = [Task.group_id == group_id]
+    if completed is not None:
+        filters.append(Task.completed == completed)
+    if deadline_from is not None:
+        filters.append(Task.deadlines >= deadline_from)
+    if deadline_to is not None:
+        filters.append(Task.deadlines < deadline_to)
+    if name_prefix:
+        filters.append(Task.name.startswith(name_prefix, autoescape=True))
+    after = tasks_after(cursor)
+    if after is not None:
+        filters.append(after)
+    query = (select(*TASK_LIST_COLUMNS)
+             .where(and_(*filters))
+             .order_by(Task.deadlines.asc().nulls_last(), Task.id)
+             .limit(limit + 1))
+    tasks = rows_to_dicts(await session.execute(query))
+    next_cursor = task_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+    access = await session.execute(select(*ACCESS_LIST_COLUMNS).where(GroupAccess.group_id == group_id))
+    return {**group._asdict(),
+            "tasks": tasks[:limit],
+            "access": rows_to_dicts(access),
+            "next_cursor": next_cursor}
+
+
+@router.get("/tasks/export", response_class=StreamingResponse)
+async def export_tasks(group_id: int,
+                       export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+                       session: AsyncSession = Depends(get_async_session),
+                       user=Depends(get_current_user)):
+    if await get_group_role(group_id, session, user) is None:
+        raise HTTPException(status_code=403, detail="You don't have permission")
+    return StreamingResponse(
+        stream_group_tasks(group_id, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="group_{group_id}_tasks.{export_format}"'},
+    )
 
 
-@router.post("/task/add")
+@router.post("/task/add", response_model=StatusResponse)
 async def create_task(task: TaskCreate, session: AsyncSession = Depends(get_async_session),
                       user=Depends(get_current_user)):
-    await is_success_role_admin(task.group_id, Role.admin, session, user)
+    await check_group_role(task.group_id, Role.admin, session, user)
     stmt = insert(Task).values(**task.dict())
     await session.execute(stmt)
     await session.commit()
+    await invalidate_cache_tags(group_tag(task.group_id))
     return {"status": "success"}
 
 
-@router.post("/image")
-async def set_image(task_id: int, file: UploadFile = File(None),
-                    session: AsyncSession = Depends(get_async_session)):
-    file_path = os.path.join(IMAGEDIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        buffer.write(file.file.read())
+@router.post("/task/bulk/add", response_model=list[BulkItemResult])
+async def bulk_create_task(data: TaskBulkCreateRequest, session: AsyncSession = Depends(get_async_session),
+                           user=Depends(get_current_user)):
+    return await bulk_create_tasks(data.tasks, session, user)
+
+
+@router.patch("/task/bulk/update", response_model=list[BulkItemResult])
+async def bulk_update_task(data: TaskBulkUpdateRequest, session: AsyncSession = Depends(get_async_session),
+                           user=Depends(get_current_user)):
+    return await bulk_update_tasks(data.tasks, session, user)
+
+
+@router.post("/task/bulk/delete", response_model=list[BulkItemResult])
+async def bulk_delete_task(data: TaskBulkDeleteRequest, session: AsyncSession = Depends(get_async_session),
+                           user=Depends(get_current_user)):
+    return await bulk_delete_tasks(data.ids, session, user)
+
+
+@router.post("/image", response_model=ImageUploadResponse)
+async def set_image(task_id: int, file: UploadFile = File(...),
+                    session: AsyncSession = Depends(get_async_session),
+                    user=Depends(get_current_user)):
+    group_id = await check_task_role(task_id, Role.manager, session, user)
+    file_path = await save_image(file)
     query = update(Task).where(Task.id == task_id).values(photo=file_path)
     await session.execute(query)
     await session.commit()
-    return {"image": file.filename}
+    await invalidate_cache_tags(group_tag(group_id))
+    generate_image_variants.delay(file_path)
+    return {"image": os.path.basename(file_path)}
+
 
+@router.get("/image/{name}", response_class=Response)
+@router.head("/image/{name}", response_class=Response)
+async def get_image(name: str, request: Request):
+    return await serve_image(name, request)
 
-@router.delete("/task/delete/{task}")
+
+@router.delete("/task/delete/{task}", response_model=StatusResponse)
 async def delete_task(task_id: int, session: AsyncSession = Depends(get_async_session),
                       user=Depends(get_current_user)):
-    stmt = select(Task).where(Task.id == task_id)
-    response = await session.execute(stmt)
-    obj = response.scalar_one()
-    await is_success_role_admin(obj.group_id, Role.admin, session, user)
-    await session.delete(obj)
+    group_id = await check_task_role(task_id, Role.admin, session, user)
+    await session.execute(delete(Task).where(Task.id == task_id))
     await session.commit()
+    await invalidate_cache_tags(group_tag(group_id))
     return {"status": "success"}
 
 
-@router.patch("/task/update")
+@router.patch("/task/update", response_model=StatusResponse)
 async def update_task(task_id: int, new_body: TaskUpdate,
                       session: AsyncSession = Depends(get_async_session),
                       user=Depends(get_current_user)):
-    await is_success_role_admin_or_manager_for_task(task_id, Role.user, session, user)
+    group_id = await check_task_role(task_id, Role.manager, session, user)
     if isinstance(new_body, dict):
         update_data = new_body
     else:
@@ -107,27 +180,31 @@ async def update_task(task_id: int, new_body: TaskUpdate,
     query = update(Task).where(Task.id == task_id).values(update_data)
     await session.execute(query)
     await session.commit()
+    await invalidate_cache_tags(group_tag(group_id), group_tag(update_data.get("group_id", group_id)))
     return {"status": "success"}
 
 
-@router.get("/group/get")
-@cache(expire=300, key_builder=request_key_builder)
-async def get_group(session: AsyncSession = Depends(get_async_session),
+@router.get("/group/get", response_model=GroupPage)
+@cached(expire=GROUP_CACHE_EXPIRE, key_builder=request_key_builder)
+async def get_group(cursor: Optional[str] = None,
+                    limit: int = Query(50, ge=1, le=500),
+                    name_prefix: Optional[str] = None,
+                    session: AsyncSession = Depends(get_async_session),
                     user=Depends(get_current_user)):
-    query = (select(GroupTasks.id,
-                    GroupTasks.name,
-                    GroupTasks.owner,
-                    GroupAccess.role)
-             .join(GroupAccess)
-             .where(and_(GroupAccess.user_id == user.id,
-                         GroupAccess.access == True)))
-    result = await session.execute(query)
-    result_models = result.unique().all()
-    result = [GroupGet.model_validate(row, from_attributes=True) for row in result_models]
-    return result
+    after = id_after(cursor)
+    params = {"user_id": user.id, "after": after or 0, "limit": limit + 1}
+    if name_prefix:
+        query = USER_GROUPS_PAGE.where(GroupTasks.name.startswith(name_prefix, autoescape=True))
+    else:
+        query = USER_GROUPS_PAGE
+    groups = rows_to_dicts(await session.execute(query, params))
+    result = groups[:limit]
+    tag_cache(*[group_tag(group["id"]) for group in result])
+    next_cursor = encode_cursor(result[-1]["id"]) if len(groups) > limit else None
+    return {"items": result, "next_cursor": next_cursor}
 
 
-@router.post("/group/add")
+@router.post("/group/add", response_model=StatusResponse)
 async def create_group(group: GroupCreate, session: AsyncSession = Depends(get_async_session),
                        user=Depends(get_current_user)):
     group_create = GroupTasks(**group.dict(), owner=user.id)
@@ -135,27 +212,30 @@ async def create_group(group: GroupCreate, session: AsyncSession = Depends(get_a
     group_create.access.append(access)
     session.add(group_create)
     await session.commit()
+    await invalidate_cache_tags(user_tag(user.id))
     return {"status": "success"}
 
 
-@router.delete("/group/delete/{group}")
+@router.delete("/group/delete/{group}", response_model=StatusResponse)
 async def delete_group(group_id: int, session: AsyncSession = Depends(get_async_session),
                        user=Depends(get_current_user)):
-    await is_success_role_admin(group_id, Role.admin, session, user)
+    await check_group_role(group_id, Role.admin, session, user)
     response = await session.execute(
         select(GroupTasks).where(GroupTasks.id == group_id)
     )
     obj = response.scalar_one()
     await session.delete(obj)
     await session.commit()
+    await invalidate_group_roles(session, group_id)
+    await invalidate_cache_tags(group_tag(group_id))
     return {"status": "success"}
 
 
-@router.patch("/group/update")
+@router.patch("/group/update", response_model=StatusResponse)
 async def update_group(group_id: int, new_body: GroupUpdate,
                        session: AsyncSession = Depends(get_async_session),
                        user=Depends(get_current_user)):
-    await is_success_role_admin_or_manager_for_group(group_id, Role.user, session, user)
+    await check_group_role(group_id, Role.manager, session, user)
     if isinstance(new_body, dict):
         update_data = new_body
     else:
@@ -165,19 +245,14 @@ async def update_group(group_id: int, new_body: GroupUpdate,
     query = update(GroupTasks).where(GroupTasks.id == group_id).values(update_data)
     await session.execute(query)
     await session.commit()
+    await invalidate_cache_tags(group_tag(group_id))
     return {"status": "success"}
 
 
-@router.get("/group/users")
+@router.get("/group/users", response_model=list[GroupAccessGet])
 async def get_user_access_for_group(group_id: int, session: AsyncSession = Depends(get_async_session),
                                     user=Depends(get_current_user)):
-    query = (select(GroupAccess)
-             .where(and_(GroupAccess.group_id == group_id,
-                         GroupAccess.user_id == user.id,
-                         GroupAccess.access == True)))
-    response = await session.execute(query)
-    result = response.unique().scalars().all()
-    if not result:
+    if await get_group_role(group_id, session, user) is None:
         raise HTTPException(status_code=403, detail="You don't have permission")
     query = (select(GroupAccess)
              .where(and_(GroupAccess.group_id == group_id,
@@ -187,37 +262,25 @@ async def get_user_access_for_group(group_id: int, session: AsyncSession = Depen
     return result_models
 
 
-@router.post("/group/add/users")
+@router.post("/group/add/users", response_model=StatusResponse)
 async def add_user_group(group_id: int, data: AccessGroupPost,
                          session: AsyncSession = Depends(get_async_session),
                          user=Depends(get_current_user)):
-    query = (select(GroupAccess)
-             .where(and_(GroupAccess.group_id == group_id,
-                         GroupAccess.user_id == user.id,
-                         GroupAccess.access == True,
-                         GroupAccess.role == Role.admin)))
-    response = await session.execute(query)
-    result = response.unique().scalars().all()
-    if not result:
+    if await get_group_role(group_id, session, user) != Role.admin:
         raise HTTPException(status_code=403, detail="You don't have permission")
     stmt = insert(GroupAccess).values(**data.dict(), group_id=group_id)
     await session.execute(stmt)
     await session.commit()
+    await invalidate_group_roles(session, group_id, data.user_id)
+    await invalidate_cache_tags(group_tag(group_id), user_tag(data.user_id))
     return {"status": "success"}
 
 
-@router.delete("/group/delete/user/{user_id}")
+@router.delete("/group/delete/user/{user_id}", response_model=StatusResponse)
 async def delete_user_by_group(group_id: int, user_id: UUID,
                                session: AsyncSession = Depends(get_async_session),
                                user=Depends(get_current_user)):
-    query = (select(GroupAccess)
-             .where(and_(GroupAccess.group_id == group_id,
-                         GroupAccess.user_id == user.id,
-                         GroupAccess.access == True,
-                         GroupAccess.role == Role.admin)))
-    response = await session.execute(query)
-    result = response.unique().scalars().all()
-    if not result:
+    if await get_group_role(group_id, session, user) != Role.admin:
         raise HTTPException(status_code=403, detail="You don't have permission")
     response = await session.execute(
         select(GroupAccess).where(and_(GroupAccess.group_id == group_id,
@@ -226,22 +289,17 @@ async def delete_user_by_group(group_id: int, user_id: UUID,
     obj = response.unique().scalar_one()
     await session.delete(obj)
     await session.commit()
+    await invalidate_group_roles(session, group_id, user_id)
+    await invalidate_cache_tags(group_tag(group_id), user_tag(user_id))
     return {"status": "success"}
 
 
-@router.patch("/group/update/user")
+@router.patch("/group/update/user", response_model=StatusResponse)
 async def update_user_group(group_id: int, user_id: UUID,
                             new_body: AccessGroupUpdate,
                             session: AsyncSession = Depends(get_async_session),
                             user=Depends(get_current_user)):
-    query = (select(GroupAccess)
-             .where(and_(GroupAccess.group_id == group_id,
-                         GroupAccess.user_id == user.id,
-                         GroupAccess.access == True,
-                         GroupAccess.role == Role.admin)))
-    response = await session.execute(query)
-    result = response.unique().scalars().all()
-    if not result:
+    if await get_group_role(group_id, session, user) != Role.admin:
         raise HTTPException(status_code=403, detail="You don't have permission")
     if isinstance(new_body, dict):
         update_data = new_body
@@ -253,4 +311,6 @@ async def update_user_group(group_id: int, user_id: UUID,
                                            GroupAccess.user_id == user_id)).values(update_data)
     await session.execute(query)
     await session.commit()
+    await invalidate_group_roles(session, group_id, user_id)
+    await invalidate_cache_tags(group_tag(group_id), user_tag(user_id))
     return {"status": "success"}
@@ -2,7 +2,7 @@ from enum import Enum
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 from src.tasks.models import Role
@@ -33,6 +33,29 @@ class TaskUpdate(BaseModel):
     group_id: Optional[int] = None
 
 
+class TaskBulkUpdate(TaskUpdate):
+    id: int
+
+
+class TaskBulkCreateRequest(BaseModel):
+    tasks: list[TaskCreate] = Field(max_length=1000)
+
+
+class TaskBulkUpdateRequest(BaseModel):
+    tasks: list[TaskBulkUpdate] = Field(max_length=1000)
+
+
+class TaskBulkDeleteRequest(BaseModel):
+    ids: list[int] = Field(max_length=1000)
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str
+    detail: Optional[str] = None
+
+
 class GroupCreate(BaseModel):
     name: str
     description: Optional[str] = None
@@ -53,7 +76,7 @@ class TaskGetWithGroup(BaseModel):
     id: int
     name: str
     completed: bool
-    deadlines: datetime
+    deadlines: Optional[datetime] = None
 
 
 class GroupGetWithTask(BaseModel):
@@ -71,6 +94,23 @@ class GroupGet(BaseModel):
     role: Role
 
 
+class GroupGetWithTaskPage(GroupGetWithTask):
+    next_cursor: Optional[str] = None
+
+
+class GroupPage(BaseModel):
+    items: list[GroupGet]
+    next_cursor: Optional[str] = None
+
+
+class GroupAccessGet(BaseModel):
+    id: int
+    user_id: UUID
+    group_id: int
+    access: bool
+    role: Optional[Role] = None
+
+
 class AccessGroupPost(BaseModel):
     user_id: UUID
     access: bool = True
@@ -80,3 +120,11 @@ class AccessGroupPost(BaseModel):
 class AccessGroupUpdate(BaseModel):
     access: Optional[bool] = None
     role: Optional[str] = None
+
+
+class StatusResponse(BaseModel):
+    status: str
+
+
+class ImageUploadResponse(BaseModel):
+    image: str
@@ -0,0 +1,80 @@
+import hashlib
+import os
+from uuid import uuid4
+
+import anyio
+from anyio import to_thread
+from fastapi import HTTPException, UploadFile
+
+from src.config import IMAGE_DIR, IMAGE_STORAGE_BACKEND, IMAGE_MAX_SIZE
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+IMAGE_CONTENT_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+
+
+class LocalStorage:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def temp_path(self) -> str:
+        return self.path(f".upload-{uuid4().hex}")
+
+    async def put(self, temp_path: str, name: str) -> str:
+        return await to_thread.run_sync(self._put, temp_path, name)
+
+    def _put(self, temp_path: str, name: str) -> str:
+        path = self.path(name)
+        if os.path.exists(path):
+            os.unlink(temp_path)
+        else:
+            os.replace(temp_path, path)
+        return path
+
+    async def discard(self, temp_path: str) -> None:
+        await to_thread.run_sync(self._discard, temp_path)
+
+    def _discard(self, temp_path: str) -> None:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+
+
+STORAGE_BACKENDS = {
+    "local": LocalStorage,
+}
+
+storage = STORAGE_BACKENDS[IMAGE_STORAGE_BACKEND](IMAGE_DIR)
+
+
+def variant_name(name: str, variant: str) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}_{variant}{ext}"
+
+
+async def save_image(file: UploadFile) -> str:
+    ext = IMAGE_CONTENT_TYPES.get(file.content_type)
+    if ext is None:
+        raise HTTPException(status_code=415, detail="Unsupported image type")
+    temp_path = storage.temp_path()
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(temp_path, "wb") as buffer:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > IMAGE_MAX_SIZE:
+                    raise HTTPException(status_code=413, detail="Image is too large")
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        await storage.discard(temp_path)
+        raise
+    return await storage.put(temp_path, digest.hexdigest() + ext)
@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl: float, max_bytes: Optional[int] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value, _ = item
+        if expires_at < time.monotonic():
+            self.pop(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        size = len(value) if self.max_bytes is not None else 0
+        if ttl <= 0 or self.max_size <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            self.pop(key)
+            return
+        self.pop(key)
+        self._data[key] = (time.monotonic() + ttl, value, size)
+        self.size_bytes += size
+        while len(self._data) > self.max_size or (self.max_bytes is not None and self.size_bytes > self.max_bytes):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self.size_bytes -= evicted_size
+
+    def pop(self, key: Hashable) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size_bytes -= item[2]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Optional
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from src.config import USER_CACHE_TTL, USER_CACHE_MAX_SIZE, USER_CACHE_REDIS_TTL
+from src.redis_client import redis
+from src.ttl_cache import TTLCache
+from src.user.models import User
+from src.user.schemas import SystemUser
+
+REDIS_KEY_PREFIX = "user-cache:"
+
+local_cache = TTLCache(max_size=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL)
+
+
+async def get_cached_user(username: str) -> Optional[SystemUser]:
+    user = local_cache.get(username)
+    if user is not None or not USER_CACHE_REDIS_TTL:
+        return user
+    try:
+        raw = await redis.get(REDIS_KEY_PREFIX + username)
+    except RedisError:
+        return None
+    if raw is None:
+        return None
+    user = SystemUser.model_validate_json(raw)
+    local_cache.set(username, user)
+    return user
+
+
+async def set_cached_user(user: SystemUser) -> None:
+    local_cache.set(user.username, user)
+    if not USER_CACHE_REDIS_TTL:
+        return
+    try:
+        await redis.set(REDIS_KEY_PREFIX + user.username, user.model_dump_json(), ex=USER_CACHE_REDIS_TTL)
+    except RedisError:
+        pass
+
+
+async def invalidate_user(username: str) -> None:
+    local_cache.pop(username)
+    if not USER_CACHE_REDIS_TTL:
+        return
+    try:
+        await redis.delete(REDIS_KEY_PREFIX + username)
+    except RedisError:
+        pass
+
+
+def schedule_invalidate_user(username: str) -> None:
+    local_cache.pop(username)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    loop.create_task(invalidate_user(username))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def collect_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    changed = session.info.setdefault("changed_usernames", set())
+    changed.update({target.username, *inspect(target).attrs.username.history.deleted})
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_users(session):
+    for username in session.info.pop("changed_usernames", ()):
+        schedule_invalidate_user(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_users(session):
+    session.info.pop("changed_usernames", None)
@@ -1,18 +1,16 @@
-from typing import Union, Any
-from datetime import datetime
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
 from jose import jwt
 from pydantic import ValidationError
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_async_session
+from src.hot_queries import USER_BY_USERNAME
 from src.user.schemas import TokenPayload, SystemUser
 
-from src.config import JWT_SECRET_KEY, ALGORITHM
-from src.user.models import User
+from src.user.cache import get_cached_user, set_cached_user
+from src.user.tokens import decode_token, revocation_list
 
 reuseable_oauth = OAuth2PasswordBearer(
     tokenUrl="/login",
@@ -20,27 +18,40 @@ reuseable_oauth = OAuth2PasswordBearer(
 )
 
 
-async def get_current_user(session: AsyncSession = Depends(get_async_session),
-                           token: str = Depends(reuseable_oauth)) -> SystemUser:
+async def verify_token(token: str, kind: str = "access") -> TokenPayload:
     try:
-        payload = jwt.decode(
-            token, JWT_SECRET_KEY, algorithms=[ALGORITHM]
+        token_data = decode_token(token, kind)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token expired",
+            headers={"WWW-Authenticate": "Bearer"},
         )
-        token_data = TokenPayload(**payload)
-        if datetime.fromtimestamp(token_data.exp) < datetime.now():
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token expired",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
     except(jwt.JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    query = select(User).where(User.username == token_data.sub)
-    result = await session.execute(query)
+    if await revocation_list.is_revoked(token_data):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_data
+
+
+async def get_token_payload(token: str = Depends(reuseable_oauth)) -> TokenPayload:
+    return await verify_token(token)
+
+
+async def get_current_user(session: AsyncSession = Depends(get_async_session),
+                           token_data: TokenPayload = Depends(get_token_payload)) -> SystemUser:
+    cached_user = await get_cached_user(token_data.sub)
+    if cached_user is not None:
+        return cached_user
+    result = await session.execute(USER_BY_USERNAME, {"username": token_data.sub})
     user_objs = result.fetchone()
     if user_objs is None:
         raise HTTPException(
@@ -48,7 +59,9 @@ async def get_current_user(session: AsyncSession = Depends(get_async_session),
             detail="Could not find user",
         )
     user = user_objs[0]
-    return SystemUser(id=user.uuid,
-                      username=user.username,
-                      email=user.email,
-                      password=user.hashed_password)
+    system_user = SystemUser(id=user.uuid,
+                             username=user.username,
+                             email=user.email,
+                             password=user.hashed_password)
+    await set_cached_user(system_user)
+    return system_user
@@ -2,20 +2,24 @@ from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select, or_, insert
+from sqlalchemy import select, or_, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from redis.exceptions import RedisError
 from starlette import status
 
 from src.database import get_async_session
+from src.hot_queries import USER_PASSWORD_HASH
 from src.user.models import User
-from src.user.schemas import BaseUser, UserOut, TokenSchema
-from src.user.utils import get_hashed_password, create_access_token, create_refresh_token
-from src.user.deps import get_current_user
+from src.user.schemas import BaseUser, UserGet, UserOut, TokenSchema, TokenPayload, RefreshRequest, LogoutRequest
+from src.user.cache import invalidate_user
+from src.user.utils import hash_password, verify_and_update_password, create_access_token, create_refresh_token
+from src.user.deps import get_current_user, get_token_payload, verify_token
+from src.user.tokens import revocation_list
 
 router = APIRouter()
 
 
-@router.post('/signup', response_model=BaseUser)
+@router.post('/signup', response_model=UserGet)
 async def create_user(data: BaseUser, session: AsyncSession = Depends(get_async_session)):
     query = select(User).where(or_(User.username == data.username,
                                    User.email == data.email))
@@ -28,7 +32,7 @@ async def create_user(data: BaseUser, session: AsyncSession = Depends(get_async_
     user = {
         'username': data.username,
         'email': data.email,
-        'hashed_password': get_hashed_password(data.password),
+        'hashed_password': await hash_password(data.password),
         'uuid': str(uuid4()),
         'name': data.name,
         'surname': data.surname
@@ -42,20 +46,63 @@ async def create_user(data: BaseUser, session: AsyncSession = Depends(get_async_
 @router.post('/login', response_model=TokenSchema)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(),
                 session: AsyncSession = Depends(get_async_session)):
-    query = select(User).where(or_(User.username == form_data.username,
-                                   User.hashed_password == get_hashed_password(form_data.password)))
-    result = await session.execute(query)
-    if result.fetchone() is None:
+    hashed_password = (await session.execute(USER_PASSWORD_HASH,
+                                             {"username": form_data.username})).scalar_one_or_none()
+    verified, new_hash = await verify_and_update_password(form_data.password, hashed_password)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect email or password"
         )
+    if new_hash is not None:
+        await session.execute(update(User)
+                              .where(User.username == form_data.username)
+                              .values(hashed_password=new_hash))
+        await session.commit()
+        await invalidate_user(form_data.username)
     return {
         "access_token": create_access_token(form_data.username),
         "refresh_token": create_refresh_token(form_data.username),
     }
 
 
+@router.post('/refresh', response_model=TokenSchema)
+async def refresh(data: RefreshRequest):
+    token_data = await verify_token(data.refresh_token, "refresh")
+    try:
+        revoked = await revocation_list.revoke(token_data)
+    except RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token service unavailable"
+        )
+    if not revoked:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return {
+        "access_token": create_access_token(token_data.sub),
+        "refresh_token": create_refresh_token(token_data.sub),
+    }
+
+
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+async def logout(data: LogoutRequest = None, token_data: TokenPayload = Depends(get_token_payload)):
+    revoked = [token_data]
+    if data is not None and data.refresh_token:
+        revoked.append(await verify_token(data.refresh_token, "refresh"))
+    try:
+        for payload in revoked:
+            await revocation_list.revoke(payload)
+    except RedisError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token service unavailable"
+        )
+
+
 @router.get('/me')
 async def get_me(user: User = Depends(get_current_user)):
     return user
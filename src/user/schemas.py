@@ -12,6 +12,14 @@ class BaseUser(BaseModel):
     surname: Optional[str] = None
 
 
+class UserGet(BaseModel):
+    uuid: UUID
+    username: str
+    email: str
+    name: Optional[str] = None
+    surname: Optional[str] = None
+
+
 class UserOut(BaseUser):
     is_active: Optional[str]
     is_admin: Optional[str]
@@ -32,3 +40,12 @@ class TokenSchema(BaseModel):
 class TokenPayload(BaseModel):
     sub: str = None
     exp: int = None
+    jti: Optional[str] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
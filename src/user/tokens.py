@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import time
+
+from jose import jwt
+from redis.exceptions import RedisError
+
+from src.bloom_filter import BloomFilter
+from src.config import ALGORITHM, JWT_SECRET_KEY, JWT_REFRESH_SECRET_KEY, TOKEN_CACHE_MAX_SIZE, TOKEN_CACHE_TTL, \
+    TOKEN_REVOCATION_CAPACITY
+from src.redis_client import redis
+from src.ttl_cache import TTLCache
+from src.user.schemas import TokenPayload
+
+logger = logging.getLogger(__name__)
+
+TOKEN_SECRETS = {"access": JWT_SECRET_KEY, "refresh": JWT_REFRESH_SECRET_KEY}
+REVOKED_KEY_PREFIX = "revoked-token:"
+REVOCATION_CHANNEL = "token-revocations"
+
+token_cache = TTLCache(max_size=TOKEN_CACHE_MAX_SIZE, ttl=TOKEN_CACHE_TTL)
+
+
+def decode_token(token: str, kind: str = "access") -> TokenPayload:
+    key = (kind, token.rpartition(".")[2])
+    cached = token_cache.get(key)
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    payload = TokenPayload(**jwt.decode(token, TOKEN_SECRETS[kind], algorithms=[ALGORITHM]))
+    ttl = min(TOKEN_CACHE_TTL, payload.exp - time.time()) if payload.exp is not None else TOKEN_CACHE_TTL
+    token_cache.set(key, (token, payload), ttl=ttl)
+    return payload
+
+
+class RevocationList:
+    def __init__(self):
+        self.bloom = BloomFilter(TOKEN_REVOCATION_CAPACITY)
+        self.synced = False
+
+    async def load(self) -> None:
+        bloom = BloomFilter(TOKEN_REVOCATION_CAPACITY)
+        async for key in redis.scan_iter(match=f"{REVOKED_KEY_PREFIX}*", count=1000):
+            bloom.add(key.decode()[len(REVOKED_KEY_PREFIX):])
+        self.bloom = bloom
+
+    async def revoke(self, payload: TokenPayload) -> bool:
+        if payload.jti is None or payload.exp is None:
+            return False
+        ttl = int(payload.exp - time.time()) + 1
+        if ttl <= 0:
+            return False
+        self.bloom.add(payload.jti)
+        async with redis.pipeline(transaction=False) as pipe:
+            revoked, _ = await pipe.set(f"{REVOKED_KEY_PREFIX}{payload.jti}", 1, ex=ttl, nx=True) \
+                .publish(REVOCATION_CHANNEL, payload.jti).execute()
+        return bool(revoked)
+
+    async def is_revoked(self, payload: TokenPayload) -> bool:
+        if payload.jti is None:
+            return False
+        if self.synced and payload.jti not in self.bloom:
+            return False
+        try:
+            return bool(await redis.exists(f"{REVOKED_KEY_PREFIX}{payload.jti}"))
+        except RedisError:
+            return payload.jti in self.bloom
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                async with redis.pubsub() as pubsub:
+                    await pubsub.subscribe(REVOCATION_CHANNEL)
+                    await self.load()
+                    self.synced = True
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        self.bloom.add(message["data"].decode())
+                        if self.bloom.count > self.bloom.capacity:
+                            await self.load()
+            except asyncio.CancelledError:
+                raise
+            except RedisError:
+                logger.warning("Token revocation listener lost connection, retrying")
+                await asyncio.sleep(1)
+            finally:
+                self.synced = False
+
+
+revocation_list = RevocationList()
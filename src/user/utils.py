@@ -1,14 +1,19 @@
-import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Union, Any
+from uuid import uuid4
+from typing import Union, Any, Optional
 from jose import jwt
 
 from passlib.context import CryptContext
 
 from src.config import JWT_REFRESH_SECRET_KEY, ALGORITHM, REFRESH_TOKEN_EXPIRE_MINUTES, JWT_SECRET_KEY, \
-    ACCESS_TOKEN_EXPIRE_MINUTES
+    ACCESS_TOKEN_EXPIRE_MINUTES, BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_context = CryptContext(schemes=["bcrypt"], deprecated="auto",
+                                bcrypt__default_rounds=BCRYPT_ROUNDS,
+                                bcrypt__min_rounds=BCRYPT_ROUNDS)
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 
 def get_hashed_password(password: str) -> str:
@@ -19,12 +24,25 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return password_context.verify(password, hashed_password)
 
 
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(password_executor, get_hashed_password, password)
+
+
+async def verify_and_update_password(password: str, hashed_password: Optional[str]) -> tuple[bool, Optional[str]]:
+    loop = asyncio.get_running_loop()
+    if hashed_password is None:
+        await loop.run_in_executor(password_executor, password_context.dummy_verify)
+        return False, None
+    return await loop.run_in_executor(password_executor, password_context.verify_and_update,
+                                      password, hashed_password)
+
+
 def create_access_token(subject: Union[str, Any], expires_delta: int = None) -> str:
     if expires_delta is not None:
         expires_delta += datetime.utcnow()
     else:
         expires_delta = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"exp": expires_delta, "sub": str(subject)}
+    to_encode = {"exp": expires_delta, "sub": str(subject), "jti": uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, ALGORITHM)
     return encoded_jwt
 
@@ -34,6 +52,6 @@ def create_refresh_token(subject: Union[str, Any], expires_delta: int = None) ->
         expires_delta += datetime.utcnow()
     else:
         expires_delta = datetime.utcnow() + timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"exp": expires_delta, "sub": str(subject)}
+    to_encode = {"exp": expires_delta, "sub": str(subject), "jti": uuid4().hex}
     encoded_jwt = jwt.encode(to_encode, JWT_REFRESH_SECRET_KEY, ALGORITHM)
     return encoded_jwt
@@ -0,0 +1,223 @@
+"""Fixtures that drive the app in-process and count SQL statements per route.
+
+The tests need the app's Postgres and Redis, configured through the usual DB_*
+and REDIS_* environment variables (localhost defaults), and are skipped when
+either is unreachable.
+Missing tables are created from the models. The user and permission caches
+are disabled and the response cache is bypassed, so every request pays its
+worst-case SQL cost.
+"""
+import asyncio
+import io
+import json
+import os
+import tempfile
+import uuid
+from urllib.parse import urlencode
+
+import pytest
+
+for name, value in {"DB_HOST": "localhost", "DB_PORT": "5432", "DB_NAME": "postgres", "DB_USER": "postgres",
+                    "DB_PASS": "postgres", "REDIS_HOST": "localhost", "REDIS_PORT": "6379"}.items():
+    os.environ.setdefault(name, value)
+if "IMAGE_DIR" not in os.environ:
+    os.environ["IMAGE_DIR"] = tempfile.mkdtemp(prefix="task-images-") + "/"
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret")
+os.environ.setdefault("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+os.environ["USER_CACHE_TTL"] = "0"
+os.environ["USER_CACHE_REDIS_TTL"] = "0"
+os.environ["PERMISSION_CACHE_TTL"] = "0"
+
+
+def services_available() -> bool:
+    import asyncpg
+    from redis import Redis, RedisError
+
+    env = {name: os.environ.get(name) for name in ("DB_HOST", "DB_PORT", "DB_NAME", "DB_USER", "DB_PASS")}
+    if not all(env.values()):
+        return False
+
+    async def connect():
+        connection = await asyncpg.connect(host=env["DB_HOST"], port=int(env["DB_PORT"]), user=env["DB_USER"],
+                                           password=env["DB_PASS"], database=env["DB_NAME"], timeout=3)
+        await connection.close()
+
+    try:
+        asyncio.run(connect())
+        Redis(host=os.environ.get("REDIS_HOST"), port=int(os.environ.get("REDIS_PORT") or 6379),
+              socket_connect_timeout=3).ping()
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError, RedisError):
+        return False
+    return True
+
+
+class CountingClient:
+    def __init__(self, app):
+        self.app = app
+        self.headers = {}
+        self.counts = {}
+
+    async def request(self, method: str, path: str, params: dict = None, json_body=None, form: dict = None,
+                      files: dict = None) -> tuple[int, dict, bytes]:
+        headers = {"cache-control": "no-cache", **self.headers}
+        body = b""
+        if json_body is not None:
+            body, headers["content-type"] = json.dumps(json_body).encode(), "application/json"
+        elif form is not None:
+            body, headers["content-type"] = urlencode(form).encode(), "application/x-www-form-urlencoded"
+        elif files is not None:
+            boundary = uuid.uuid4().hex
+            for name, (filename, content, content_type) in files.items():
+                body += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                         f"Content-Type: {content_type}\r\n\r\n").encode() + content + b"\r\n"
+            body += f"--{boundary}--\r\n".encode()
+            headers["content-type"] = f"multipart/form-data; boundary={boundary}"
+        headers["content-length"] = str(len(body))
+        scope = {"type": "http", "http_version": "1.1", "method": method, "scheme": "http", "path": path,
+                 "raw_path": path.encode(), "query_string": urlencode(params or {}).encode(), "root_path": "",
+                 "headers": [(key.encode(), value.encode()) for key, value in headers.items()],
+                 "client": ("127.0.0.1", 0), "server": ("testserver", 80)}
+        response = {"body": b""}
+        request_sent, response_done = False, asyncio.Event()
+
+        async def receive():
+            nonlocal request_sent
+            if request_sent:
+                await response_done.wait()
+                return {"type": "http.disconnect"}
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {key.decode(): value.decode() for key, value in message["headers"]}
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+                if not message.get("more_body", False):
+                    response_done.set()
+
+        await self.app(scope, receive, send)
+        return response["status"], response["headers"], response["body"]
+
+    async def check(self, method: str, route: str, path: str = None, **kwargs):
+        # Streaming responses send Server-Timing before the body, so the final count comes from the
+        # histogram the metrics middleware observes once the response is complete.
+        before = statements_run(route)
+        status, headers, body = await self.request(method, path or route, **kwargs)
+        queries = int(statements_run(route) - before)
+        self.counts[(method, route)] = max(queries, self.counts.get((method, route), 0))
+        if status >= 400:
+            raise RuntimeError(f"{method} {route} returned {status}: {body[:200]!r}")
+        return json.loads(body) if body and headers.get("content-type", "").startswith("application/json") else body
+
+
+def statements_run(route: str) -> float:
+    from prometheus_client import REGISTRY
+
+    return REGISTRY.get_sample_value("http_request_db_queries_sum", {"route": route}) or 0.0
+
+
+def png_bytes() -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def run_async(main):
+    # Pooled Postgres and Redis connections belong to the loop that opened them, so they are
+    # closed before asyncio.run() tears that loop down.
+    from src.database import engine
+    from src.redis_client import redis
+
+    async def run():
+        try:
+            return await main()
+        finally:
+            await engine.dispose()
+            await redis.connection_pool.disconnect()
+
+    return asyncio.run(run())
+
+
+async def sign_in(client: CountingClient, name: str) -> dict:
+    await client.check("POST", "/signup", json_body={"username": name, "password": "budget",
+                                                     "email": f"{name}@example.com"})
+    tokens = await client.check("POST", "/login", form={"username": name, "password": "budget"})
+    client.headers["authorization"] = f"Bearer {tokens['access_token']}"
+    return tokens
+
+
+async def run_session(client: CountingClient) -> None:
+    suffix = uuid.uuid4().hex[:8]
+    owner, member = f"budget-owner-{suffix}", f"budget-member-{suffix}"
+    tokens = {}
+    for name in (member, owner):
+        tokens[name] = await sign_in(client, name)
+    client.headers["authorization"] = f"Bearer {tokens[member]['access_token']}"
+    member_id = (await client.check("GET", "/me"))["id"]
+    tokens = tokens[owner]
+    client.headers["authorization"] = f"Bearer {tokens['access_token']}"
+
+    await client.check("POST", "/tasks/group/add", json_body={"name": f"budget group {suffix}"})
+    groups = await client.check("GET", "/tasks/group/get", params={"name_prefix": f"budget group {suffix}"})
+    group_id = groups["items"][0]["id"]
+    await client.check("PATCH", "/tasks/group/update", params={"group_id": group_id},
+                       json_body={"description": "query budget check"})
+    await client.check("POST", "/tasks/group/add/users", params={"group_id": group_id},
+                       json_body={"user_id": member_id, "role": "user"})
+    await client.check("PATCH", "/tasks/group/update/user", params={"group_id": group_id, "user_id": member_id},
+                       json_body={"role": "manager"})
+    await client.check("GET", "/tasks/group/users", params={"group_id": group_id})
+
+    await client.check("POST", "/tasks/task/add", json_body={"name": "budget task", "group_id": group_id})
+    await client.check("POST", "/tasks/task/bulk/add",
+                       json_body={"tasks": [{"name": f"bulk task {n}", "group_id": group_id} for n in range(3)]})
+    tasks = (await client.check("GET", "/tasks/tasks/get", params={"group_id": group_id}))["tasks"]
+    task_ids = [task["id"] for task in tasks]
+    await client.check("GET", "/tasks/tasks/export", params={"group_id": group_id})
+    await client.check("PATCH", "/tasks/task/update", params={"task_id": task_ids[0]},
+                       json_body={"completed": True})
+    await client.check("PATCH", "/tasks/task/bulk/update",
+                       json_body={"tasks": [{"id": task_id, "completed": True, "deadlines": None}
+                                            for task_id in task_ids]})
+    image = (await client.check("POST", "/tasks/image", params={"task_id": task_ids[0]},
+                                files={"file": ("budget.png", png_bytes(), "image/png")}))["image"]
+    await client.check("GET", "/tasks/image/{name}", f"/tasks/image/{image}")
+    await client.check("HEAD", "/tasks/image/{name}", f"/tasks/image/{image}")
+    await client.check("POST", "/tasks/task/bulk/delete", json_body={"ids": task_ids[1:]})
+    await client.check("DELETE", "/tasks/task/delete/{task}", f"/tasks/task/delete/{task_ids[0]}",
+                       params={"task_id": task_ids[0]})
+
+    await client.check("GET", "/email/dashboard")
+    tokens = await client.check("POST", "/refresh", json_body={"refresh_token": tokens["refresh_token"]})
+    client.headers["authorization"] = f"Bearer {tokens['access_token']}"
+    await client.check("DELETE", "/tasks/group/delete/user/{user_id}", f"/tasks/group/delete/user/{member_id}",
+                       params={"group_id": group_id, "user_id": member_id})
+    await client.check("DELETE", "/tasks/group/delete/{group}", f"/tasks/group/delete/{group_id}",
+                       params={"group_id": group_id})
+    await client.check("POST", "/logout", json_body={"refresh_token": tokens["refresh_token"]})
+
+
+@pytest.fixture(scope="session")
+def app():
+    if not services_available():
+        pytest.skip("Postgres or Redis is not available")
+    from src.database import Base, engine
+    from src.main import app
+
+    async def create_schema():
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+    run_async(create_schema)
+    return app
+
+
+@pytest.fixture(scope="session")
+def query_counts(app) -> dict:
+    client = CountingClient(app)
+    run_async(lambda: run_session(client))
+    return client.counts
@@ -0,0 +1,22 @@
+import uuid
+
+from tests.conftest import CountingClient, run_async, sign_in
+
+
+def test_bulk_create_returns_each_items_own_id(app):
+    client = CountingClient(app)
+    deadlines = ["2026-01-01T09:00:00", "2026-02-01T09:00:00", "2026-03-01T09:00:00"]
+
+    async def run():
+        suffix = uuid.uuid4().hex[:8]
+        await sign_in(client, f"bulk-owner-{suffix}")
+        await client.check("POST", "/tasks/group/add", json_body={"name": f"bulk group {suffix}"})
+        groups = await client.check("GET", "/tasks/group/get", params={"name_prefix": f"bulk group {suffix}"})
+        group_id = groups["items"][0]["id"]
+        created = await client.check("POST", "/tasks/task/bulk/add", json_body={"tasks": [
+            {"name": "same", "group_id": group_id, "deadlines": deadline} for deadline in deadlines]})
+        page = await client.check("GET", "/tasks/tasks/get", params={"group_id": group_id})
+        return created, {task["id"]: task["deadlines"] for task in page["tasks"]}
+
+    created, stored = run_async(run)
+    assert [stored[item["id"]] for item in created] == deadlines
@@ -0,0 +1,22 @@
+import pytest
+from fastapi.routing import APIRoute
+
+from src.query_budgets import QUERY_BUDGETS
+
+
+@pytest.mark.parametrize("method, route", sorted(QUERY_BUDGETS), ids=lambda value: value)
+def test_query_budget(query_counts, method, route):
+    assert (method, route) in query_counts, f"{method} {route} is not exercised"
+    assert query_counts[(method, route)] <= QUERY_BUDGETS[(method, route)]
+
+
+def test_every_route_has_a_budget():
+    from src.celery_task.router import router as celery_router
+    from src.tasks.router import router as router_tasks
+    from src.user.router import router as user_router
+
+    routes = {(method, route.path)
+              for router in (router_tasks, user_router, celery_router)
+              for route in router.routes if isinstance(route, APIRoute)
+              for method in route.methods}
+    assert routes - set(QUERY_BUDGETS) == set()